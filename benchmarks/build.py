@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+
+Offline build benchmark, run from the root of the repository:
+
+    python benchmarks/build.py [--sizes 1000 10000 100000] [--releases N]
+                               [--json PATH] [-- GENERATOR OPTIONS]
+
+For each size, writes a synthetic catalog (see synthetic.py) to a temporary
+directory and builds it with all the stages enabled, offline: the feed is
+read from its cached copy and the releases from the fresh api cache. The
+timings of the stages are read from the build report; the peak RSS of the
+build (including its process pools) from wait4(). Prints the wall time and
+throughput of every stage, the peak RSS and the size of the output
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import write_catalog  # noqa: E402
+
+GENERATOR_OPTIONS = (
+    "--generate-app-pages",
+    "--generate-app-list",
+    "--generate-categories-pages",
+    "--copy-theme",
+    "--noconfirm",
+    "--disable-progress-bar",
+    # the feed is read from the store, fetching it again would fail
+    "--feed-json=http://127.0.0.1:9/feed.json",
+    # the releases are read from the api cache, any request would fail
+    "--gh-token=offline",
+    "--api-cache-ttl=999999999",
+    "--github-api-url=http://127.0.0.1:9",
+)
+
+
+def get_directory_size(directory):
+    files = size = 0
+    for path, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            files += 1
+            size += os.path.getsize(os.path.join(path, file_name))
+    return files, size
+
+
+def run_build(size, releases, options):
+    """
+    Builds a synthetic catalog of `size` apps and returns its results
+    :param size: number of apps
+    :type size: int
+    :param releases: number of releases per GitHub hosted app
+    :type releases: int
+    :param options: additional options of the generator
+    :type options: list
+    :return:
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        write_catalog(directory, apps=size, releases=releases)
+        stderr = open(os.path.join(directory, "stderr.log"), "w+")
+        process = subprocess.Popen(
+            (sys.executable, "-m", "generator", "--input-directory", ROOT)
+            + GENERATOR_OPTIONS
+            + ("--build-report", "report.json")
+            + tuple(options),
+            cwd=directory,
+            env=dict(os.environ, PYTHONPATH=ROOT),
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
+        )
+        # unlike Popen.wait, wait4 returns the resource usage of the build
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = status
+        with stderr:
+            if not os.WIFEXITED(status) or os.WEXITSTATUS(status) != 0:
+                stderr.seek(0)
+                raise RuntimeError(
+                    "the build of {} apps failed\n{}".format(size, stderr.read())
+                )
+        with open(os.path.join(directory, "report.json"), "r") as r:
+            report = json.load(r)
+        files, output_size = get_directory_size(
+            os.path.join(directory, "catalog-compiled")
+        )
+    if report["network"]:
+        print("WARNING the build made requests: {}".format(report["network"]))
+    return {
+        "apps": size,
+        "wall": report["wall"],
+        "stages": report["stages"],
+        # kilobytes on linux
+        "peak_rss": rusage.ru_maxrss * 1024,
+        "files": files,
+        "output_size": output_size,
+    }
+
+
+def print_result(result):
+    print(
+        "{} apps: {:.2f}s, peak RSS {:.1f} MB, {} files, {:.1f} MB".format(
+            result["apps"],
+            result["wall"],
+            result["peak_rss"] / 1024**2,
+            result["files"],
+            result["output_size"] / 1024**2,
+        )
+    )
+    for stage, times in result["stages"].items():
+        print(
+            "  {:<24} {:>9.3f}s {:>12.0f} apps/s".format(
+                stage, times["wall"], result["apps"] / max(times["wall"], 1e-9)
+            )
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[-1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000],
+        help="Numbers of apps of the synthetic catalogs (default: 1000)",
+    )
+    parser.add_argument(
+        "--releases",
+        type=int,
+        default=5,
+        help="Number of releases per GitHub hosted app (default: 5)",
+    )
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("options", nargs="*", help="Options of the generator")
+    args = parser.parse_args()
+
+    results = list()
+    for size in args.sizes:
+        results.append(run_build(size, args.releases, args.options))
+        print_result(results[-1])
+
+    if args.json:
+        with open(args.json, "w") as w:
+            json.dump(results, w, indent=2)
+
+
+if __name__ == "__main__":
+    main()
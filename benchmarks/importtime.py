@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+
+Import time regression check, run from the root of the repository:
+
+    python benchmarks/importtime.py [--budget MS]
+
+Imports generator.main and parses --version in a fresh interpreter, from an
+empty working directory, and fails if
+* any module importing a heavy dependency is loaded at import time
+* any file other than python sources is opened
+* the cumulative import time of generator.main (python -X importtime)
+  exceeds the budget
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# loaded by the stages which need them, never at import time
+DEFERRED_MODULES = (
+    "jinja2",
+    "mistune",
+    "dateutil",
+    "progressbar",
+    "urllib.request",
+    "concurrent.futures",
+)
+
+PROBE = """
+import json
+import os
+import sys
+
+opened = []
+
+
+def audit(event, args):
+    if event != "open" or not isinstance(args[0], str):
+        return
+    if args[0].endswith((".py", ".pyc")) or os.path.isdir(args[0]):
+        return
+    opened.append(args[0])
+
+
+sys.addaudithook(audit)
+
+import generator.main
+from generator.cli import parse_args
+
+parse_args(["--version"])
+print(json.dumps({"opened": opened, "modules": sorted(sys.modules)}))
+"""
+
+
+def run(code, *options, **environment):
+    env = dict(os.environ, PYTHONPATH=ROOT, PYTHONDONTWRITEBYTECODE="1")
+    env.update(environment)
+    with tempfile.TemporaryDirectory() as cwd:
+        return subprocess.run(
+            (sys.executable,) + options + ("-c", code),
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+
+def import_time(module):
+    """
+    Returns the cumulative import time of `module` in microseconds, as
+    reported by python -X importtime
+    :param module:
+    :type module: str
+    :return:
+    :rtype: int
+    """
+    # the first run writes the bytecode of the generator to a temporary
+    # prefix, so that the measured run does not compile it
+    with tempfile.TemporaryDirectory() as prefix:
+        bytecode = dict(PYTHONDONTWRITEBYTECODE="", PYTHONPYCACHEPREFIX=prefix)
+        run("import {}".format(module), **bytecode)
+        stderr = run("import {}".format(module), "-X", "importtime", **bytecode).stderr
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise RuntimeError("{} not found in the importtime output".format(module))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[-2])
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=150,
+        help="Maximum cumulative import time of generator.main in ms",
+    )
+    args = parser.parse_args()
+
+    failed = False
+    result = run(PROBE)
+    if result.returncode != 0:
+        print("FAIL importing generator.main raised\n{}".format(result.stderr))
+        sys.exit(1)
+    probe = json.loads(result.stdout)
+    for module in DEFERRED_MODULES:
+        if module in probe["modules"]:
+            print("FAIL {} is imported by generator.main".format(module))
+            failed = True
+    for path in probe["opened"]:
+        print("FAIL {} is opened by generator.main".format(path))
+        failed = True
+
+    cumulative = import_time("generator.main") / 1000
+    print(
+        "generator.main imports in {:.1f} ms (budget: {:.0f} ms)".format(
+            cumulative, args.budget
+        )
+    )
+    if cumulative > args.budget:
+        print("FAIL import time exceeds the budget")
+        failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
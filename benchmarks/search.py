@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+
+Search index benchmark, run from the root of the repository after a build:
+
+    python benchmarks/search.py [--index catalog-compiled/index.min.json]
+                                [--scale N] [QUERY ...]
+
+Compares the two ways static/js/search.js can answer a query:
+* old: download index.min.json, parse it and index every app in the
+  browser (measured with SearchIndexBuilder, a port of that indexing)
+* new: download the meta data of the pre-built index, the shards of the
+  query terms and docs.json, parse them and score the query (measured with
+  score_query, a port of scoreQuery() of search.js)
+and prints the bytes downloaded and the time spent for each query. --scale
+repeats the apps of the index to simulate a larger catalog. When node is
+installed, the rankings of scoreQuery() are checked against score_query
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generator.search import (  # noqa: E402
+    FUZZY,
+    FUZZY_WEIGHT,
+    PREFIX_WEIGHT,
+    SEARCH_INDEX_DIRECTORY,
+    SearchIndexBuilder,
+    get_shard_key,
+    tokenize,
+)
+
+QUERIES = ("audio", "aud", "editr", "video player", "game", "gane", "xame")
+
+NODE_PROBE = """
+const fs = require('fs');
+const vm = require('vm');
+const context = {console: console};
+vm.createContext(context);
+vm.runInContext(fs.readFileSync(process.argv[1], 'utf8'), context);
+const directory = process.argv[2];
+const read = (name) => JSON.parse(fs.readFileSync(directory + '/' + name, 'utf8'));
+const meta = read('meta.json');
+const shards = {};
+for (const key of meta['shards']) {
+  shards[key] = read(`terms-${key}.json`);
+}
+const results = {};
+for (const query of JSON.parse(process.argv[3])) {
+  results[query] = context.scoreQuery(query, meta, shards);
+}
+console.log(JSON.stringify(results));
+"""
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Port of editDistance() of static/js/search.js
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            )
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[len(b)]
+
+
+def has_prefix_match(query_term, shards):
+    """
+    Port of hasPrefixMatch() of static/js/search.js
+    """
+    return any(
+        term.startswith(query_term)
+        for term, _ in shards.get(get_shard_key(query_term), ())
+    )
+
+
+def score_query(query, meta, shards):
+    """
+    Port of scoreQuery() of static/js/search.js
+    :return: (document, score) pairs, best first
+    :rtype: list
+    """
+    scores = dict()
+    for query_term in tokenize(query):
+        max_distance = math.floor(len(query_term) * FUZZY + 0.5)
+        if has_prefix_match(query_term, shards):
+            keys = [get_shard_key(query_term)]
+        else:
+            keys = sorted(shards)
+        terms = [entry for key in keys for entry in shards.get(key, ())]
+        for term, postings in terms:
+            if term == query_term:
+                weight = 1
+            elif term.startswith(query_term):
+                weight = (
+                    PREFIX_WEIGHT
+                    * len(term)
+                    / (len(term) + 0.3 * (len(term) - len(query_term)))
+                )
+            else:
+                distance = edit_distance(query_term, term, max_distance)
+                if distance > max_distance:
+                    continue
+                weight = FUZZY_WEIGHT * len(term) / (len(term) + distance)
+            idf = math.log(1 + meta["documents"] / len(set(postings[::3])))
+            for k in range(0, len(postings), 3):
+                document = postings[k]
+                scores[document] = (
+                    scores.get(document, 0)
+                    + weight * meta["boost"][postings[k + 1]] * idf * postings[k + 2]
+                )
+    return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+
+def scale_index(records, scale):
+    if scale <= 1:
+        return records
+    scaled = list()
+    for k in range(scale):
+        for record in records:
+            scaled.append(dict(record, name="{} {}".format(record["name"], k)))
+    return scaled
+
+
+def old_path(index_path, query):
+    start = time.perf_counter()
+    with open(index_path, "r") as r:
+        records = json.load(r)
+    builder = SearchIndexBuilder("")
+    for record in records:
+        builder.add(record)
+    meta, shards = builder.build()
+    score_query(query, meta, shards)
+    return os.path.getsize(index_path), time.perf_counter() - start
+
+
+def new_path(directory, query):
+    start = time.perf_counter()
+    files = ["meta.json"]
+    with open(os.path.join(directory, "meta.json"), "r") as r:
+        meta = json.load(r)
+    shards = dict()
+
+    def load_shards(keys):
+        for key in keys:
+            if key in shards or key not in meta["shards"]:
+                continue
+            files.append("terms-{}.json".format(key))
+            with open(os.path.join(directory, files[-1]), "r") as r:
+                shards[key] = json.load(r)
+
+    terms = tokenize(query)
+    load_shards(get_shard_key(term) for term in terms)
+    if not all(has_prefix_match(term, shards) for term in terms):
+        # a typo in the first character, see loadSearchIndex
+        load_shards(meta["shards"])
+    files.append("docs.json")
+    with open(os.path.join(directory, "docs.json"), "r") as r:
+        json.load(r)
+    score_query(query, meta, shards)
+    size = sum(os.path.getsize(os.path.join(directory, x)) for x in files)
+    return size, time.perf_counter() - start
+
+
+def check_node(directory, queries):
+    """
+    Compares the rankings of scoreQuery() and score_query, returns False
+    when they differ
+    """
+    node = shutil.which("node")
+    if node is None:
+        print("node is not installed, skipping the scoreQuery() check")
+        return True
+    with open(os.path.join(directory, "meta.json"), "r") as r:
+        meta = json.load(r)
+    shards = dict()
+    for key in meta["shards"]:
+        with open(os.path.join(directory, "terms-{}.json".format(key)), "r") as r:
+            shards[key] = json.load(r)
+    result = subprocess.run(
+        (
+            node,
+            "-e",
+            NODE_PROBE,
+            os.path.join(ROOT, "static", "js", "search.js"),
+            directory,
+            json.dumps(queries),
+        ),
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    rankings = json.loads(result.stdout)
+    passed = True
+    for query in queries:
+        expected = score_query(query, meta, shards)
+        got = rankings[query]
+        same = [x[0] for x in expected] == [x[0] for x in got] and all(
+            math.isclose(x[1], y[1], rel_tol=1e-9) for x, y in zip(expected, got)
+        )
+        if not same:
+            print("FAIL scoreQuery({!r}) differs from score_query".format(query))
+            passed = False
+    if passed:
+        print("scoreQuery() matches score_query for {} queries".format(len(queries)))
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[-1])
+    parser.add_argument(
+        "--index",
+        default=os.path.join("catalog-compiled", "index.min.json"),
+        help="index.min.json of a build (default: catalog-compiled/index.min.json)",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Number of times the apps of the index are repeated (default: 1)",
+    )
+    parser.add_argument("queries", nargs="*", default=QUERIES)
+    args = parser.parse_args()
+
+    with open(args.index, "r") as r:
+        records = scale_index(json.load(r), args.scale)
+
+    with tempfile.TemporaryDirectory() as output_directory:
+        index_path = os.path.join(output_directory, "index.min.json")
+        with open(index_path, "w") as w:
+            json.dump(records, w)
+        builder = SearchIndexBuilder(output_directory)
+        for record in records:
+            builder.add(record)
+        builder.write()
+        directory = os.path.join(output_directory, SEARCH_INDEX_DIRECTORY)
+
+        print(
+            "{:<16} {:>12} {:>10} {:>12} {:>10}".format(
+                "query", "old bytes", "old ms", "new bytes", "new ms"
+            )
+        )
+        for query in args.queries:
+            old_size, old_time = old_path(index_path, query)
+            new_size, new_time = new_path(directory, query)
+            print(
+                "{:<16} {:>12} {:>10.2f} {:>12} {:>10.2f}".format(
+                    query, old_size, old_time * 1000, new_size, new_time * 1000
+                )
+            )
+        passed = check_node(directory, list(args.queries))
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
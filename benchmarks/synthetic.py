@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+
+Synthetic catalog generator, run from the root of the repository:
+
+    python benchmarks/synthetic.py [--apps N] [--releases N] [--seed N] DIRECTORY
+
+Writes the feed of N apps and their fresh GitHub releases to the store of
+the generator, DIRECTORY/catalog.sqlite3, so that a build in DIRECTORY runs
+offline with --gh-token <anything> --api-cache-ttl <large>. The apps are shaped like
+the items of https://appimage.github.io/feed.json: mostly GitHub hosted,
+some GitLab or direct downloads, some without links, icons or screenshots,
+with one to three categories and an occasional invalid one
+"""
+
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from generator.cache import ApiCache, prune_releases  # noqa: E402
+from generator.constants import CATEGORIES  # noqa: E402
+from generator.store import STORE_PATH, CatalogStore  # noqa: E402
+
+WORDS = (
+    "audio video editor player manager simple fast open free desktop "
+    "image viewer music terminal code notes text graphics network game "
+    "system utility office browser chat download sync backup converter"
+).split()
+
+LICENSES = ("MIT", "GPL-3.0", "Apache-2.0", "BSD-3-Clause", None)
+
+# categories of feed.json which are not freedesktop categories
+INVALID_CATEGORIES = ("Weird", "Other")
+
+
+def _words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def generate_app(i, rng):
+    """
+    Returns the feed.json item of the i-th synthetic app
+    :param i:
+    :type i: int
+    :param rng:
+    :type rng: random.Random
+    :return:
+    :rtype: dict
+    """
+    name = "{}-{}".format(_words(rng, 2).title().replace(" ", ""), i)
+    kind = rng.random()
+    if kind < 0.8:
+        links = [
+            {"type": "GitHub", "url": "owner{}/{}".format(i, name.lower())},
+            {
+                "type": "Download",
+                "url": "https://github.com/owner{}/releases".format(i),
+            },
+        ]
+    elif kind < 0.88:
+        links = [{"type": "GitLab", "url": "group{}/{}".format(i, name.lower())}]
+    elif kind < 0.96:
+        links = [{"type": "Download", "url": "https://example.org/{}".format(name)}]
+    else:
+        links = None
+
+    categories = rng.sample(CATEGORIES, rng.randint(1, 3))
+    if rng.random() < 0.02:
+        categories.append(rng.choice(INVALID_CATEGORIES))
+
+    if rng.random() < 0.8:
+        authors = [
+            {"name": "author{}".format(rng.randint(0, 5000)), "url": "https://x"}
+            for _ in range(rng.randint(1, 2))
+        ]
+    else:
+        authors = None
+
+    return {
+        "name": name,
+        "description": "<p>{}.</p>".format(_words(rng, rng.randint(5, 40))),
+        "categories": categories,
+        "authors": authors,
+        "license": rng.choice(LICENSES),
+        "links": links,
+        "icons": (
+            ["{}/icons/128x128/{}.png".format(name, name.lower())]
+            if rng.random() < 0.85
+            else None
+        ),
+        "screenshots": (
+            ["{}/screenshot.png".format(name)] if rng.random() < 0.6 else None
+        ),
+    }
+
+
+def generate_releases(repo, rng, count):
+    """
+    Returns `count` releases of `repo` in the shape of the GitHub REST api
+    :param repo: owner/repo path
+    :type repo: str
+    :param rng:
+    :type rng: random.Random
+    :param count:
+    :type count: int
+    :return:
+    :rtype: list
+    """
+    releases = list()
+    for k in range(count):
+        tag = "continuous" if k == 0 else "v{}.{}".format(count - k, rng.randint(0, 9))
+        assets = [
+            {
+                "name": "{}-{}-x86_64.AppImage".format(repo.split("/")[1], tag),
+                "browser_download_url": "https://github.com/{}/releases/download/"
+                "{}/app-x86_64.AppImage".format(repo, tag),
+                "size": rng.randint(10**6, 2 * 10**8),
+            },
+            {
+                "name": "app-x86_64.AppImage.zsync",
+                "browser_download_url": "https://github.com/{}/releases/download/"
+                "{}/app-x86_64.AppImage.zsync".format(repo, tag),
+                "size": rng.randint(10**3, 10**5),
+            },
+        ]
+        releases.append(
+            {
+                "tag_name": tag,
+                "html_url": "https://github.com/{}/releases/tag/{}".format(repo, tag),
+                "prerelease": k == 0,
+                "published_at": "20{:02d}-{:02d}-{:02d}T10:00:00Z".format(
+                    20 - k % 10, rng.randint(1, 12), rng.randint(1, 28)
+                ),
+                "author": {"login": "bot", "id": 1},
+                "body": _words(rng, rng.randint(10, 100)),
+                "assets": assets,
+            }
+        )
+    return releases
+
+
+def write_catalog(directory, apps=1000, releases=5, seed=0):
+    """
+    Writes the synthetic feed and releases to the store in `directory`
+    :param directory:
+    :type directory: str
+    :param apps: number of apps
+    :type apps: int
+    :param releases: number of releases per GitHub hosted app
+    :type releases: int
+    :param seed: seed of the random generator
+    :type seed: int
+    :return: the feed.json items
+    :rtype: list
+    """
+    rng = random.Random(seed)
+    items = [generate_app(i, rng) for i in range(apps)]
+
+    store = CatalogStore(os.path.join(directory, STORE_PATH))
+    store.update_apps(items)
+    cache = ApiCache(store)
+    for item in items:
+        links = item["links"]
+        if not links or links[0]["type"] != "GitHub":
+            continue
+        repo = links[0]["url"]
+        cache.write(
+            repo, prune_releases(generate_releases(repo, rng, releases)), dict()
+        )
+    store.close()
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[2])
+    parser.add_argument("directory")
+    parser.add_argument("--apps", type=int, default=1000)
+    parser.add_argument("--releases", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    items = write_catalog(args.directory, args.apps, args.releases, args.seed)
+    print("Wrote {} apps to {}".format(len(items), args.directory))
+
+
+if __name__ == "__main__":
+    main()
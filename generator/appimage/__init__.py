@@ -27,15 +27,8 @@ This file is part of AppImage Catalog Generator
 """
 import hashlib
 import html
-import json
-import os
-import urllib.request
-import urllib.error
-import uuid
-import sys
 
 import dateutil.parser
-from colorama import Fore
 
 from generator.catalog import Catalog
 from generator.constants import (
@@ -47,11 +40,15 @@ from generator.constants import (
     TAGS_GROUP_NO_MARGIN_HTML,
     GROUPED_BORDER_HTML,
 )
+from generator.fetcher import get_github_api_data, get_github_release_from
+
+from .record import AppRecord
 
 
 class AppImage:
-    def __init__(self, app, token=None):
+    def __init__(self, app, token=None, github_api_data=None):
         self.token = token
+        self._github_api_data = github_api_data
         self._title = html.escape(app.get("name", ""))
         self._categories = app.get("categories")
         self._description = app.get("description")
@@ -64,7 +61,6 @@ class AppImage:
         self.gitlab_info = self.get_gitlab_info()
         self.obs_info = self.get_obs_info()
         self.static_info = self.get_static_info()
-        self.catalog = Catalog()
 
     @property
     def screenshots_html(self):
@@ -196,11 +192,30 @@ class AppImage:
                 "/database/{}".format(icon)
             )
         elif self._icon is None:
-            icon = "{}/img/logo.svg".format(self.catalog.base_url)
+            icon = "{}/img/logo.svg".format(Catalog().base_url)
         else:
-            icon = "{}/img/logo.svg".format(self.catalog.base_url)
+            icon = "{}/img/logo.svg".format(Catalog().base_url)
         return icon
 
+    @property
+    def last_updated(self):
+        """
+        Returns the publishing time of the latest release, or None if the
+        releases are not known
+        :return:
+        :rtype: str
+        """
+        if not self.is_github() or not self.github_info:
+            return None
+        published = [
+            release.get("published_at")
+            for key, release in self.github_info.items()
+            if isinstance(key, int) and release.get("published_at")
+        ]
+        if not published:
+            return None
+        return max(published)
+
     def is_github(self):
         """
         Checks if the app-image has its source link from github
@@ -353,84 +368,22 @@ class AppImage:
         )
 
     def get_github_release_from(self, github_release_api):
-        request = urllib.request.Request(github_release_api)
-        request.add_header("Authorization", "Bearer {}".format(self.token))
-        try:
-            request_url = urllib.request.urlopen(request)
-        except urllib.error.HTTPError as err:
-            print(
-                Fore.RED
-                + "[STATIC][{}][GH] Request to {} failed with {}".format(
-                    self.title, github_release_api, err.code
-                )
-                + Fore.RESET
-            )
-            if err.code == 403:
-                print("Quitting because of ratelimit")
-                sys.exit(61)
-            return False
-        status = request_url.status
-        if status != 200:
-            print(
-                Fore.RED
-                + "[STATIC][{}][GH] Request to {} failed with {}".format(
-                    self.title, github_release_api, status
-                )
-                + Fore.RESET
-            )
-            return False
-        return request_url
+        return get_github_release_from(
+            github_release_api, token=self.token, title=self.title
+        )
 
     def get_github_api_data(self):
         """
-        Gets the data from api.github.com
+        Gets the data from api.github.com, unless it was prefetched
         :return:
         :rtype:
         """
-        if not os.path.exists("api"):
-            os.makedirs("api")
-
-        # Replace all / to _ for caching
-        path_to_local_github_json = os.path.join(
-            "api", "{}.json".format(self._links[0].get("url").replace("/", "_"))
+        if self._github_api_data is not None:
+            return self._github_api_data
+        return get_github_api_data(
+            self._links[0].get("url"), token=self.token, title=self.title
         )
 
-        if os.path.exists(path_to_local_github_json):
-            with open(path_to_local_github_json, "r") as r:
-                github_api_data = r.read()
-            json_data = json.loads(github_api_data)
-            return json_data
-
-        github_release_api = "https://api.github.com/repos/{path}/releases".format(
-            path=self._links[0].get("url")
-        )
-
-        # get the request urllib response instance or bool
-        request_url = self.get_github_release_from(github_release_api)
-        # check if request succeeded:
-        if not request_url:
-            return False
-
-        # read the data
-        github_api_data = request_url.read().decode()  # noqa:
-        with open(
-            os.path.join(
-                "api", "{}.json".format(self._links[0].get("url").replace("/", "_"))
-            ),
-            "w",
-        ) as w:
-            w.write(github_api_data)
-
-        # attempt to parse the json data with the hope that the data is json
-        try:
-            json.loads(github_api_data)
-        except json.decoder.JSONDecodeError:
-            return False
-
-        # load the data
-        json_data = json.loads(github_api_data)
-        return json_data
-
     def get_github_info(self):
         if not self.is_github():
             # pre check if the appimage is from github, if not, exit
@@ -560,18 +513,6 @@ class AppImage:
         else:
             return self.static_info
 
-    def json_data(self):
-        return {
-            "id": uuid.uuid4().hex,
-            "name": self.title,
-            "image": self.icon,
-            "maintainer": self.maintainer,
-            "summary": self.description,
-            "links": self.links,
-            "categories": self.categories,
-            "categories_html": self.categories_html,
-        }
-
     @property
     def links_formatted(self):
         if self.is_github:
@@ -580,11 +521,29 @@ class AppImage:
             # TODO: Add support for other instances here
             return ""
 
-    def shields_badge(self):
-        return {
-            "schemaVersion": 1,
-            "label": "Get AppImage",
-            "message": self.json_data().get("name"),
-            "color": "green",
-            "logoSvg": '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 16.933 16.933" height="64" width="64"><g transform="matrix(.91146 0 0 .91146 -10.218 1.495)"><path d="M14.558-1.295a1.27 1.27 0 00-1.272 1.272v15.602c0 .704.567 1.27 1.272 1.27H26.7c.704 0 1.271-.566 1.271-1.27V1.892l-3.217-3.187zM19.233.349h2.792V3.14h1.483l-2.88 3.257-2.877-3.257h1.482zM20 7.075h1.32l.049.05c.046.047.053.078.118.513.038.254.073.48.078.502.006.026.032.046.075.06.036.013.141.054.233.093l.166.071.4-.3c.427-.319.45-.33.554-.266.079.048.694.66.814.808.088.11.102.136.102.203 0 .084.011.067-.403.602l-.173.224.055.12c.03.067.077.182.104.257l.05.136.479.075c.263.041.497.08.519.087.088.029.094.07.094.744 0 .662-.006.71-.086.743-.018.005-.252.05-.521.089l-.489.074-.033.091c-.018.05-.063.154-.099.231-.053.116-.062.148-.046.182s.238.321.522.677c.025.03.05.085.056.118.008.052-.002.078-.074.173-.192.257-.736.784-.887.861-.06.03-.081.034-.136.015-.036-.01-.227-.148-.426-.304-.339-.267-.363-.282-.408-.264l-.24.098-.193.078-.021.172c-.028.233-.104.7-.128.783a.222.222 0 01-.066.104c-.045.035-.07.04-.699.04h-.651l-.05-.05c-.046-.049-.053-.077-.118-.512-.037-.254-.073-.48-.078-.502-.006-.025-.032-.049-.075-.06a2.83 2.83 0 01-.234-.094l-.166-.072-.368.28c-.202.154-.387.29-.41.302-.089.049-.15.015-.414-.233a6.032 6.032 0 01-.574-.586c-.09-.108-.103-.132-.103-.202 0-.09.005-.096.367-.56l.21-.27-.068-.147a2.858 2.858 0 01-.1-.249.635.635 0 00-.044-.113 5.501 5.501 0 00-.496-.085 4.552 4.552 0 01-.518-.094c-.07-.044-.076-.089-.076-.734 0-.66.006-.707.086-.742.018-.007.252-.047.52-.088l.486-.074.044-.117c.025-.065.07-.174.101-.241l.057-.123-.066-.095a12.025 12.025 0 00-.293-.382 2.895 2.895 0 01-.238-.327c-.014-.056.012-.114.103-.23a7.76 7.76 0 01.697-.703c.159-.128.224-.158.295-.133.029.01.217.147.42.304.345.267.371.284.415.266l.239-.099.192-.077.032-.245c.036-.281.093-.615.119-.705a.302.302 0 01.057-.105zm.664 2.647c-.74 0-1.323.584-1.323 1.323 0 .53.301.996.787 1.216.23.104.55.136.821.08a1.325 1.325 0 00-.285-2.619z" fill="#efefef"/><path d="M20.367 7.08c-.005.025-.014.047-.014.087V8.23a.224.224 0 01-.175.218c-.297.067-.576.19-.829.349a.224.224 0 01-.276-.03l-.756-.755c-.025-.025-.039-.031-.058-.044l-.567.567c.013.02.019.034.044.058l.756.756a.224.224 0 01.029.277c-.16.252-.282.531-.35.828a.224.224 0 01-.218.175h-1.06c-.042 0-.063.01-.088.015v.814c.025.005.046.014.087.014h1.061a.224.224 0 01.219.175c.067.297.189.576.349.829a.224.224 0 01-.03.276l-.755.756c-.025.024-.031.04-.044.058l.567.567c.02-.014.033-.02.058-.044l.756-.756a.224.224 0 01.276-.03c.253.16.532.282.83.35a.224.224 0 01.174.218v1.06c0 .04.009.063.014.088h.815c.005-.024.014-.049.014-.087V13.87a.224.224 0 01.175-.218c.297-.068.576-.19.828-.35a.224.224 0 01.277.03l.756.756c.025.025.038.03.058.044l.567-.567c-.013-.02-.019-.034-.044-.058l-.756-.756a.224.224 0 01-.029-.276 2.66 2.66 0 00.35-.83.224.224 0 01.217-.174h1.062c.04 0 .062-.01.087-.014v-.814c-.025-.006-.047-.015-.087-.015h-1.062a.224.224 0 01-.218-.175 2.662 2.662 0 00-.35-.828.224.224 0 01.03-.277l.756-.756c.025-.025.03-.038.043-.058l-.567-.567c-.019.013-.033.019-.058.044l-.756.756a.224.224 0 01-.276.029 2.662 2.662 0 00-.829-.35.224.224 0 01-.174-.217V7.167c0-.04-.01-.062-.015-.087zm.407 2.457c.834 0 1.513.679 1.513 1.512 0 .834-.679 1.512-1.513 1.512a1.514 1.514 0 01-1.512-1.512c0-.833.679-1.512 1.512-1.512z" style="marker:none" overflow="visible" fill="none"/><path d="M16.696 10.642v.352c0-.18.005-.257.008-.352zm2.713 0a1.322 1.322 0 00.72 1.618c.23.105.55.137.821.08a1.325 1.325 0 001.01-1.009c.05-.242.028-.475-.04-.689zm5.216 0c.004.108.01.186.01.412 0 .662-.006.71-.086.743-.018.005-.252.05-.521.089l-.489.074-.033.091c-.018.05-.063.154-.099.231-.053.116-.062.148-.046.182s.238.321.522.677c.025.03.05.085.056.118.008.052-.002.078-.074.173-.192.257-.736.784-.887.861-.06.03-.081.034-.136.015-.036-.01-.227-.148-.426-.304-.339-.267-.363-.282-.408-.264l-.24.098-.193.078-.021.172c-.028.233-.104.7-.128.783a.222.222 0 01-.066.104c-.045.035-.07.04-.699.04h-.651l-.05-.05c-.046-.049-.053-.077-.118-.512-.037-.254-.073-.48-.078-.502-.006-.025-.032-.049-.075-.06a2.83 2.83 0 01-.234-.094l-.166-.072-.368.28c-.202.154-.387.29-.41.302-.089.049-.15.015-.414-.233a6.032 6.032 0 01-.574-.586c-.09-.108-.103-.132-.103-.202 0-.09.005-.096.367-.56l.21-.27-.068-.147a2.858 2.858 0 01-.1-.249.635.635 0 00-.044-.113 5.501 5.501 0 00-.496-.085 4.552 4.552 0 01-.518-.094c-.068-.043-.074-.111-.075-.688v5.771h7.947v-6.209z" fill="#e6e6e6"/><circle r="1.632" cy="11.103" cx="20.72" fill="#efefef"/><path d="M24.745-1.295V.73a1.15 1.15 0 001.153 1.152h2.065l-.34-.335L25.085-.96z" fill="#bebebe"/></g></svg>',
-        }
+    def to_record(self):
+        """
+        Computes every field and HTML fragment of the app once, and returns
+        them as an immutable AppRecord
+        :return:
+        :rtype: AppRecord
+        """
+        return AppRecord(
+            title=self.title,
+            title_formatted=self.title_formatted,
+            folder=self.title.lower(),
+            description=self.description,
+            categories=self.categories,
+            categories_html=self.categories_html,
+            authors=tuple(self.authors),
+            maintainer=self.maintainer,
+            licenses=self.licenses,
+            links=self.links,
+            icon=self.icon,
+            screenshots_html=self.screenshots_html,
+            is_verified=self.is_verified,
+            is_verified_html=self.is_verified_html,
+            links_formatted=self.links_formatted,
+            metadata=self.get_app_metadata(),
+            last_updated=self.last_updated,
+        )
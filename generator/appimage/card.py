@@ -1,6 +1,16 @@
 class Card:
+    __slots__ = (
+        "app",
+        "name_lower_case",
+        "source_code_url",
+        "is_github",
+        "left_description",
+        "right_description",
+    )
+
     def __init__(self, app):
         self.app = app
+        self.name_lower_case = app["name"].lower()
 
         self.source_code_url = ""
         self.is_github = ""
@@ -30,7 +40,3 @@ class Card:
 
     def __getattr__(self, item):
         return self.app[item]
-
-    @property
-    def name_lower_case(self):
-        return self.app["name"].lower()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+from generator.constants import SHIELDS_LOGO_SVG
+from generator.utils import digest
+
+
+class AppRecord:
+    """
+    Immutable record of an app, holding the fields and HTML fragments
+    derived from its feed.json item and releases, see AppImage.to_record.
+    The app templates, the index record (json_data) and the shields.io
+    badge read from it directly; it pickles as a tuple of its fields
+    """
+
+    __slots__ = (
+        "title",
+        "title_formatted",
+        "folder",
+        "description",
+        "categories",
+        "categories_html",
+        "authors",
+        "maintainer",
+        "licenses",
+        "links",
+        "icon",
+        "screenshots_html",
+        "is_verified",
+        "is_verified_html",
+        "links_formatted",
+        "metadata",
+        "last_updated",
+    )
+
+    def __init__(self, *args, **kwargs):
+        """
+        :param args: the fields, in the order of __slots__
+        :param kwargs: the fields, by name
+        """
+        values = dict(zip(self.__slots__, args), **kwargs)
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AppRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("AppRecord is immutable")
+
+    def __reduce__(self):
+        return AppRecord, tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return "AppRecord({!r})".format(self.title)
+
+    def json_data(self):
+        """
+        Returns the entry of the app in index.min.json. Its id is derived
+        from the other fields, so that it only changes with them
+        :return:
+        :rtype: dict
+        """
+        data = {
+            "name": self.title,
+            "image": self.icon,
+            "maintainer": self.maintainer,
+            "summary": self.description,
+            "links": self.links,
+            "categories": self.categories,
+            "categories_html": self.categories_html,
+        }
+        data["id"] = digest(data)[:32]
+        return data
+
+    def shields_badge(self):
+        """
+        Returns the shields.io endpoint badge of the app (shields.json)
+        :return:
+        :rtype: dict
+        """
+        return {
+            "schemaVersion": 1,
+            "label": "Get AppImage",
+            "message": self.title,
+            "color": "green",
+            "logoSvg": SHIELDS_LOGO_SVG,
+        }
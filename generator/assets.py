@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import hashlib
+import os
+import re
+import shutil
+
+from colorama import Fore
+
+from .catalog import Catalog
+from .writers import link_output, open_output, previous_path, remove_output
+
+# directories of `static` copied to the output directory
+ASSET_DIRECTORIES = ("css", "img", "js", "search", "badges", "favicon")
+
+# templates of the asset directories, which are rendered to the output
+# directory by LibraryBuilder.create_static_directories instead
+TEMPLATE_FILES = ("search/index.html",)
+
+# directories whose files also get a content hashed copy, e.g
+# css/main.css -> css/main.0123456789.css, for the asset() template function
+FINGERPRINTED_DIRECTORIES = ("css", "img", "js", "favicon")
+
+HASH_LENGTH = 10
+
+_HASHED_NAME = re.compile(r"^(.+)\.[0-9a-f]{%d}(\.[^.]+)$" % HASH_LENGTH)
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_WHITESPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,>])\s*")
+
+
+def minify_css(source):
+    """
+    Removes the comments and the redundant whitespace of a stylesheet
+    :param source:
+    :type source: str
+    :return:
+    :rtype: str
+    """
+    source = _CSS_COMMENT.sub("", source)
+    source = _CSS_WHITESPACE.sub(" ", source)
+    return _CSS_PUNCTUATION.sub(r"\1", source).replace(";}", "}").strip()
+
+
+def minify_js(source):
+    """
+    Minifies a script with rjsmin, if it is installed
+    :param source:
+    :type source: str
+    :return:
+    :rtype: str
+    """
+    try:
+        import rjsmin
+    except ImportError:
+        return source
+    return rjsmin.jsmin(source)
+
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+
+def get_hashed_name(path, sha256):
+    root, extension = os.path.splitext(path)
+    return "{}.{}{}".format(root, sha256[:HASH_LENGTH], extension)
+
+
+class AssetManifest:
+    def __init__(self, static_directory):
+        """
+        Content hashes of the files of the fingerprinted directories of
+        `static`, computed on first use.
+        The asset() template function returns the url of the hashed copy
+        of a file, which changes whenever the file does, so it can be
+        served with far-future cache headers
+        :param static_directory: path to `static`
+        :type static_directory: str
+        """
+        self.static_directory = static_directory
+        self._hashes = dict()
+
+    def sha256(self, path):
+        """
+        Returns the sha256 of the file `path` relative to `static`, or
+        None if it cannot be fingerprinted
+        :param path: e.g css/main.css
+        :type path: str
+        :return:
+        :rtype: str
+        """
+        if path not in self._hashes:
+            self._hashes[path] = None
+            source = os.path.join(self.static_directory, path)
+            if path.split("/")[0] in FINGERPRINTED_DIRECTORIES and os.path.isfile(
+                source
+            ):
+                with open(source, "rb") as r:
+                    self._hashes[path] = hashlib.sha256(r.read()).hexdigest()
+        return self._hashes[path]
+
+    def hashed_path(self, path):
+        sha256 = self.sha256(path)
+        if sha256 is None:
+            return path
+        return get_hashed_name(path, sha256)
+
+    def url(self, path):
+        """
+        Returns the url of the hashed copy of `path`, or of `path` itself
+        if it is not fingerprinted. Available as asset() in the templates
+        :param path: path relative to `static`, e.g css/main.css
+        :type path: str
+        :return:
+        :rtype: str
+        """
+        return "{}/{}".format(Catalog().base_url, self.hashed_path(path))
+
+    def files(self):
+        """
+        Returns the paths of all the fingerprinted files
+        :return:
+        :rtype: list
+        """
+        files = list()
+        for directory in FINGERPRINTED_DIRECTORIES:
+            root = os.path.join(self.static_directory, directory)
+            for path, _, file_names in os.walk(root):
+                for file_name in file_names:
+                    files.append(
+                        os.path.relpath(
+                            os.path.join(path, file_name), self.static_directory
+                        ).replace(os.path.sep, "/")
+                    )
+        return sorted(files)
+
+    def digest(self):
+        """
+        Returns a hash of all the fingerprinted files. Pages which link to
+        them must be rendered again when it changes
+        :return:
+        :rtype: str
+        """
+        sha = hashlib.sha256()
+        for path in self.files():
+            sha.update(path.encode())
+            sha.update(self.sha256(path).encode())
+        return sha.hexdigest()
+
+
+def _is_up_to_date(source, destination, data=None):
+    if not os.path.exists(destination):
+        return False
+    if data is not None:
+        with open(destination, "rb") as r:
+            return r.read() == data
+    source_stat = os.stat(source)
+    destination_stat = os.stat(destination)
+    return (
+        source_stat.st_size == destination_stat.st_size
+        and source_stat.st_mtime_ns == destination_stat.st_mtime_ns
+    )
+
+
+def _link(source, destination):
+    """
+    Hardlinks `destination` to `source`, or copies it where hardlinks are
+    not supported
+    """
+    if os.path.exists(destination):
+        if os.path.samefile(source, destination):
+            return
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def sync_assets(manifest, output_directory, minify=False):
+    """
+    Copies the asset directories of `static` to `output_directory`, except
+    their templates (see TEMPLATE_FILES).
+    Files which did not change since the last build are not copied again,
+    the hashed copies of the fingerprinted files are hardlinks to the
+    unhashed ones and stale hashed copies are removed
+    :param manifest: the asset manifest of the templates
+    :type manifest: AssetManifest
+    :param output_directory: root output directory
+    :type output_directory: str
+    :param minify: minify the stylesheets and scripts
+    :type minify: bool
+    :return: the number of copied and unchanged files
+    :rtype: tuple
+    """
+    copied = unchanged = 0
+    for directory in ASSET_DIRECTORIES:
+        print("[STATIC] Copying {}".format(directory))
+        source_root = os.path.join(manifest.static_directory, directory)
+        for path, _, file_names in os.walk(source_root):
+            relative_directory = os.path.relpath(path, manifest.static_directory)
+            destination_directory = os.path.join(output_directory, relative_directory)
+            os.makedirs(destination_directory, exist_ok=True)
+            hashed_files = set()
+            for file_name in file_names:
+                source = os.path.join(path, file_name)
+                destination = os.path.join(destination_directory, file_name)
+                relative_path = os.path.join(relative_directory, file_name).replace(
+                    os.path.sep, "/"
+                )
+                if relative_path in TEMPLATE_FILES:
+                    continue
+
+                data = None
+                minifier = MINIFIERS.get(os.path.splitext(file_name)[1])
+                if minify and minifier is not None:
+                    with open(source, "r") as r:
+                        data = minifier(r.read()).encode()
+
+                previous = previous_path(destination)
+                if _is_up_to_date(source, destination, data):
+                    unchanged += 1
+                elif data is not None:
+                    with open_output(destination) as w:
+                        w.write(data)
+                    copied += 1
+                elif (
+                    previous is not None
+                    and _is_up_to_date(source, previous)
+                    and link_output(previous, destination)
+                ):
+                    # copied by the previous build
+                    unchanged += 1
+                else:
+                    remove_output(destination)
+                    shutil.copy2(source, destination)
+                    copied += 1
+
+                hashed_name = os.path.basename(manifest.hashed_path(relative_path))
+                if hashed_name != file_name:
+                    hashed_files.add(hashed_name)
+                    _link(destination, os.path.join(destination_directory, hashed_name))
+
+            # remove the hashed copies of previous versions of the files
+            for file_name in os.listdir(destination_directory):
+                if (
+                    _HASHED_NAME.match(file_name)
+                    and file_name not in hashed_files
+                    and file_name not in file_names
+                ):
+                    print(
+                        Fore.YELLOW
+                        + "[STATIC] Removing stale asset {}".format(file_name)
+                        + Fore.RESET
+                    )
+                    os.remove(os.path.join(destination_directory, file_name))
+    print("[STATIC] {} assets copied, {} unchanged".format(copied, unchanged))
+    return copied, unchanged
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+import os
+import time
+
+from .report import report
+from .store import CatalogStore
+
+# the directory the releases were cached in by older versions
+LEGACY_CACHE_DIRECTORY = "api"
+
+
+def prune_release(release):
+    """
+    Returns the parts of a release of the GitHub REST api which are read by
+    AppImage.get_github_info: its tag, url, author, publishing time and
+    the AppImage assets. Missing fields are left out
+    :param release: release of the repos/{path}/releases endpoint
+    :type release: dict
+    :return:
+    :rtype: dict
+    """
+    author = release.get("author")
+    pruned = {
+        "tag_name": release.get("tag_name"),
+        "html_url": release.get("html_url"),
+        "prerelease": release.get("prerelease"),
+        "published_at": release.get("published_at"),
+        "author": {"login": author.get("login")} if author else None,
+    }
+    pruned = dict((key, value) for key, value in pruned.items() if value is not None)
+    pruned["assets"] = [
+        {
+            "name": asset.get("name"),
+            "browser_download_url": asset.get("browser_download_url"),
+            "size": asset.get("size"),
+        }
+        for asset in release.get("assets") or []
+        if (asset.get("browser_download_url") or "").lower().endswith(".appimage")
+    ]
+    return pruned
+
+
+def prune_releases(releases):
+    """
+    Prunes a list of releases, see prune_release. Every release is kept,
+    because all of them are listed in the core.json of the app
+    :param releases: releases of the repos/{path}/releases endpoint
+    :type releases: list
+    :return:
+    :rtype: list
+    """
+    return [prune_release(release) for release in releases]
+
+
+class ApiCache:
+    def __init__(self, store=None, max_age=0):
+        """
+        Caches the releases of GitHub repositories in the releases and
+        assets of a CatalogStore, along with the validators (ETag,
+        Last-Modified) of the response, the time it was fetched at and the
+        status of the last request
+        :param store: (defaults to: CatalogStore())
+        :type store: CatalogStore
+        :param max_age: number of seconds a cached response is used without
+        revalidating it with the server
+        :type max_age: int
+        """
+        self.store = store if store is not None else CatalogStore()
+        self.max_age = max_age
+
+    def read(self, repo):
+        """
+        Returns the cached releases of `repo`
+        :param repo: owner/repo path
+        :type repo: str
+        :return:
+        :rtype: list
+        """
+        return self.store.read_releases(repo)
+
+    def meta(self, repo):
+        """
+        Returns the metadata of the cached releases of `repo`, or an empty
+        dict if `repo` is not cached
+        :param repo: owner/repo path
+        :type repo: str
+        :return:
+        :rtype: dict
+        """
+        return self.store.fetch_meta(repo)
+
+    def is_fresh(self, repo):
+        """
+        Checks if the cached releases of `repo` are younger than max_age
+        :param repo: owner/repo path
+        :type repo: str
+        :return:
+        :rtype: bool
+        """
+        fetched_at = self.meta(repo).get("fetched_at")
+        if fetched_at is None:
+            return False
+        if time.time() - fetched_at < self.max_age:
+            report.count("api_cache.hit")
+            return True
+        return False
+
+    def validators(self, repo):
+        """
+        Returns the conditional request headers for `repo`
+        :param repo: owner/repo path
+        :type repo: str
+        :return:
+        :rtype: dict
+        """
+        meta = self.meta(repo)
+        headers = dict()
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def write(self, repo, releases, headers, status=200, fetched_at=None):
+        """
+        Writes the fresh releases of `repo` to the cache
+        :param repo: owner/repo path
+        :type repo: str
+        :param releases: pruned releases, see prune_releases
+        :type releases: list
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :param status: http status of the response
+        :type status: int
+        :param fetched_at: (defaults to: now)
+        :type fetched_at: float
+        :return:
+        :rtype:
+        """
+        report.count("api_cache.miss")
+        with self.store.transaction():
+            self.store.write_releases(repo, releases)
+            self.store.fetched(repo, headers, status, fetched_at)
+
+    def revalidated(self, repo, headers, status=304):
+        """
+        Records that the cached releases of `repo` are still valid
+        :param repo: owner/repo path
+        :type repo: str
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :param status: http status of the response
+        :type status: int
+        :return:
+        :rtype:
+        """
+        report.count("api_cache.revalidated")
+        self.store.fetched(repo, headers, status)
+
+    def import_legacy(self, directory=LEGACY_CACHE_DIRECTORY):
+        """
+        Moves the releases cached in `directory` by older versions (as
+        <owner>_<repo>.json files) into the store, and removes them. They
+        have no validators and are fetched again
+        :param directory:
+        :type directory: str
+        :return: number of imported repositories
+        :rtype: int
+        """
+        if not os.path.isdir(directory):
+            return 0
+        entries = list()
+        legacy_files = list()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, "r") as r:
+                    releases = prune_releases(json.load(r))
+            except (OSError, ValueError, TypeError, AttributeError):
+                continue
+            legacy_files.append(path)
+            # GitHub logins cannot contain underscores
+            entries.append((filename[: -len(".json")].replace("_", "/", 1), releases))
+
+        with self.store.transaction():
+            for repo, releases in entries:
+                self.store.write_releases(repo, releases)
+                self.store.fetched(repo, dict(), fetched_at=0)
+        for path in legacy_files:
+            if os.path.exists(path):
+                os.remove(path)
+        if not os.listdir(directory):
+            os.rmdir(directory)
+        print(
+            "[UPSTREAM] Imported the releases of {} repositories from {}".format(
+                len(entries), directory
+            )
+        )
+        return len(entries)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import hashlib
+
+from .appimage.card import Card
+from .catalog import Catalog
+from .report import report
+
+
+class CardCache:
+    def __init__(self, templates, store, template_name="card.html"):
+        """
+        Renders the card of each index record of `store` once per build,
+        so that the app list and every category page which lists an app
+        splice the same HTML fragment. Cards are keyed by the position of
+        their record and the version of the card template
+        :param templates: template registry
+        :type templates: generator.templates.TemplateRegistry
+        :param store:
+        :type store: generator.store.CatalogStore
+        :param template_name:
+        :type template_name: str
+        """
+        self.store = store
+        self.template = templates.get(template_name)
+        self.version = hashlib.sha256(
+            templates.source(template_name).encode()
+        ).hexdigest()
+        self.catalog = Catalog()
+        self.cards = dict()
+
+    def get(self, position):
+        """
+        Returns the HTML of the card of the index record at `position`
+        :param position: position of the record, see CatalogStore.positions
+        :type position: int
+        :return:
+        :rtype: str
+        """
+        key = (self.version, position)
+        card = self.cards.get(key)
+        if card is None:
+            report.count("cards.rendered")
+            card = self.template.render(
+                card=Card(self.store.record(position)), catalog=self.catalog
+            )
+            self.cards[key] = card
+        else:
+            report.count("cards.reused")
+        return card
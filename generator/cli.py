@@ -32,11 +32,19 @@ import os
 from colorama import Fore
 
 from . import __version__
+from .constants import (
+    COMPRESS_MIN_SIZE,
+    GITHUB_API_URL,
+    JSON_API_PAGE_SIZE,
+    SITEMAP_MAX_URLS,
+)
 
 
-def parse_args():
+def parse_args(argv=None):
     """
     Parses arguments using argparse and returns parse_args()
+    :param argv: list of arguments (defaults to: sys.argv[1:])
+    :type argv: list
     :return:
     :rtype:
     """
@@ -86,8 +94,8 @@ def parse_args():
         "-F",
         "--force-refresh-feed",
         default="",
-        help="Fetches feed.json again, and then parses content rather than "
-        "cached copy",
+        help="Fetches feed.json again, rather than revalidating the copy "
+        "cached by a previous build",
     )
     parser.add_argument(
         "-x",
@@ -95,6 +103,21 @@ def parse_args():
         default="",
         help="Generate a sitemap.xml file to the output directory",
     )
+    parser.add_argument(
+        "--sitemap-max-urls",
+        type=int,
+        default=SITEMAP_MAX_URLS,
+        help="Maximum number of urls per sitemap file (default: {})".format(
+            SITEMAP_MAX_URLS
+        ),
+    )
+    parser.add_argument(
+        "--api-page-size",
+        type=int,
+        default=JSON_API_PAGE_SIZE,
+        help="Number of apps per page of the JSON api in api/v1 "
+        "(default: {})".format(JSON_API_PAGE_SIZE),
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="More verbose logging"
     )
@@ -116,6 +139,134 @@ def parse_args():
         default=[],
         help="Provide the GitHub OAuth token (defaults to: env GH_TOKEN)",
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=8,
+        help="Number of concurrent requests to the GitHub api (default: 8)",
+    )
+    parser.add_argument(
+        "--http-pool-size",
+        type=int,
+        default=8,
+        help="Maximum number of idle keep-alive connections kept open per "
+        "host (default: 8)",
+    )
+    parser.add_argument(
+        "--github-api-url",
+        default=GITHUB_API_URL,
+        help="Base url of the GitHub REST api (defaults to: {})".format(GITHUB_API_URL),
+    )
+    parser.add_argument(
+        "--github-backend",
+        choices=("rest", "graphql"),
+        default="rest",
+        help="Fetch the releases from the REST api, one request per "
+        "repository, or from the GraphQL api in batches (default: rest)",
+    )
+    parser.add_argument(
+        "--graphql-batch-size",
+        type=int,
+        default=50,
+        help="Number of repositories per GraphQL query (default: 50)",
+    )
+    parser.add_argument(
+        "--graphql-releases",
+        type=int,
+        default=10,
+        help="Number of latest releases to query per repository with the "
+        "GraphQL backend (default: 10)",
+    )
+    parser.add_argument(
+        "--store",
+        default="catalog.sqlite3",
+        help="Path to the SQLite store of the feed, the GitHub releases and "
+        "the index records kept between builds (default: catalog.sqlite3)",
+    )
+    parser.add_argument(
+        "--api-cache-ttl",
+        type=int,
+        default=0,
+        help="Number of seconds a cached GitHub api response is used without "
+        "revalidating it with a conditional request (default: 0)",
+    )
+    parser.add_argument(
+        "--ratelimit-max-wait",
+        type=int,
+        default=3600,
+        help="Maximum number of seconds to sleep until a GitHub token is "
+        "reset, when all tokens are ratelimited (default: 3600)",
+    )
+    parser.add_argument(
+        "--render-workers",
+        type=int,
+        default=1,
+        help="Number of processes rendering the app pages (default: 1)",
+    )
+    parser.add_argument(
+        "--template-cache",
+        default=os.path.join(os.getcwd(), ".template-cache"),
+        help="Directory to cache the compiled templates in, reused by later "
+        "builds (default: ./.template-cache)",
+    )
+    parser.add_argument(
+        "--minify-assets",
+        action="store_true",
+        help="Minify the stylesheets and scripts copied by --copy-theme "
+        "(scripts need rjsmin)",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write gzip (and brotli, if the brotli module is installed) "
+        "compressed copies of the generated html, json, xml, css and js files",
+    )
+    parser.add_argument(
+        "--compress-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of processes compressing files (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--compress-min-size",
+        type=int,
+        default=COMPRESS_MIN_SIZE,
+        help="Minimum size in bytes of the files to precompress "
+        "(default: {})".format(COMPRESS_MIN_SIZE),
+    )
+    parser.add_argument(
+        "--build-report",
+        default="build-report.json",
+        help="Write the timings and counters of the build to this JSON file, "
+        "or nothing if empty (default: build-report.json)",
+    )
+    transport = parser.add_mutually_exclusive_group()
+    transport.add_argument(
+        "--record",
+        metavar="FIXTURES",
+        help="Record all the http responses of the build to a fixture "
+        "store (e.g fixtures.jsonl.gz)",
+    )
+    transport.add_argument(
+        "--replay",
+        metavar="FIXTURES",
+        help="Serve the http requests of the build from a fixture store "
+        "written by --record, without network access",
+    )
+    parser.add_argument(
+        "--apply-delta",
+        metavar="TARGET",
+        help="Copy the files of the output directory which changed since "
+        "the build deployed to TARGET (e.g a checkout of gh-pages), remove "
+        "the deleted ones and exit, see .deploy-manifest.json",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep the output directory and only render the apps which "
+        "changed since the last build",
+    )
     parser.add_argument(
         "-G", "--generate-app-list", action="store_true", help="Parses app list"
     )
@@ -145,7 +296,7 @@ def parse_args():
         help="Suppress colors in terminal (default: env ANSI_COLORS_DISABLED)",
     )
     parser.add_argument("--version", action="store_true", help="Show the version")
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     return args
 
 
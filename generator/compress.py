@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import gzip
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .constants import COMPRESS_MIN_SIZE
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (".html", ".json", ".xml", ".css", ".js")
+
+# extension of the sibling, and the function compressing the data
+ENCODINGS = [(".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+if brotli is not None:
+    ENCODINGS.append((".br", lambda data: brotli.compress(data, quality=11)))
+
+
+def _is_up_to_date(path, sibling):
+    return os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(
+        path
+    )
+
+
+def compress_file(path, min_size=COMPRESS_MIN_SIZE):
+    """
+    Writes the compressed siblings (path.gz, path.br) of `path`, unless
+    they are newer than `path` already. Files smaller than `min_size` and
+    siblings which would not be smaller than `path` are skipped, and
+    outdated siblings of skipped files are removed
+    :param path:
+    :type path: str
+    :param min_size: minimum size of the files to compress, in bytes
+    :type min_size: int
+    :return: the number of siblings written
+    :rtype: int
+    """
+    written = 0
+    size = os.path.getsize(path)
+    data = None
+    for extension, compress in ENCODINGS:
+        sibling = "{}{}".format(path, extension)
+        if _is_up_to_date(path, sibling):
+            continue
+        if size >= min_size:
+            if data is None:
+                with open(path, "rb") as r:
+                    data = r.read()
+            compressed = compress(data)
+            if len(compressed) < size:
+                with open("{}.part".format(sibling), "wb") as w:
+                    w.write(compressed)
+                os.replace("{}.part".format(sibling), sibling)
+                written += 1
+                continue
+        if os.path.exists(sibling):
+            # compressed from a previous version of the file
+            os.remove(sibling)
+    return written
+
+
+def _compress_files(paths, min_size):
+    return sum(compress_file(path, min_size) for path in paths)
+
+
+def find_compressible_files(output_directory):
+    """
+    Returns the paths of the files in `output_directory` which can be
+    precompressed, and removes the siblings whose file no longer exists
+    :param output_directory:
+    :type output_directory: str
+    :return:
+    :rtype: list
+    """
+    paths = list()
+    extensions = tuple(extension for extension, _ in ENCODINGS)
+    for directory, _, file_names in os.walk(output_directory):
+        for file_name in file_names:
+            path = os.path.join(directory, file_name)
+            if file_name.startswith("."):
+                # build state, e.g the incremental build manifest
+                continue
+            if file_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                paths.append(path)
+            elif file_name.endswith(extensions) and os.path.splitext(file_name)[
+                0
+            ].endswith(COMPRESSIBLE_EXTENSIONS):
+                if not os.path.exists(os.path.splitext(path)[0]):
+                    os.remove(path)
+    return sorted(paths)
+
+
+def compress_output(output_directory, workers=1, min_size=COMPRESS_MIN_SIZE):
+    """
+    Precompresses the html, json, xml, css and js files of the output
+    directory to gzip (.gz) and, if the brotli module is installed, brotli
+    (.br) siblings, for static servers which serve them as they are (e.g
+    nginx gzip_static / brotli_static). Files are sharded across a process
+    pool with more than one worker
+    :param output_directory: root output directory
+    :type output_directory: str
+    :param workers: number of processes
+    :type workers: int
+    :param min_size: minimum size of the files to compress, in bytes
+    :type min_size: int
+    :return: the number of siblings written
+    :rtype: int
+    """
+    paths = find_compressible_files(output_directory)
+    print(
+        "[STATIC] Precompressing {} files ({})".format(
+            len(paths), ", ".join(extension for extension, _ in ENCODINGS)
+        )
+    )
+    if workers <= 1:
+        written = _compress_files(paths, min_size)
+    else:
+        shard_size = max(1, -(-len(paths) // (workers * 4)))
+        shards = [paths[i : i + shard_size] for i in range(0, len(paths), shard_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            written = sum(
+                executor.map(_compress_files, shards, [min_size] * len(shards))
+            )
+    print("[STATIC] Wrote {} compressed files".format(written))
+    return written
@@ -26,14 +26,10 @@ SOFTWARE.
 This file is part of AppImage Catalog Generator
 """
 
-with open("static/app/app.html", "r") as r:
-    APPTEMPLATE = r.read()
-
-with open("static/app/app.md", "r") as r:
-    APPTEMPLATE_MD = r.read()
-
 FEED_URL_JSON = "https://appimage.github.io/feed.json"
 
+GITHUB_API_URL = "https://api.github.com"
+
 CATEGORIES = [
     "Audio",
     "Office",
@@ -50,9 +46,6 @@ CATEGORIES = [
     "Network",
 ]
 
-with open("static/templates/card.html", "r") as r:
-    CARD_TEMPLATE = r.read()
-
 DOWNLOAD_BUTTON_HTML = (
     '<a href="{url}" target="_blank"><button '
     'class="button appimage-store-button">'
@@ -112,8 +105,33 @@ SITEMAP_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
 
 SITEMAP_URL = """<url>
   <loc>{url}</loc>
-  <lastmod>{lastmod}</lastmod>
-  <changefreq>{changefreq}</changefreq>
+{lastmod}  <changefreq>{changefreq}</changefreq>
   <priority>0.8</priority>
 </url>
 """
+
+SITEMAP_LASTMOD = """  <lastmod>{}</lastmod>
+"""
+
+SITEMAP_INDEX_HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+{content}
+</sitemapindex>
+"""
+
+SITEMAP_INDEX_URL = """<sitemap>
+  <loc>{url}</loc>
+{lastmod}</sitemap>
+"""
+
+# limits of a single sitemap file, https://www.sitemaps.org/protocol.html
+SITEMAP_MAX_URLS = 50000
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024
+
+JSON_API_PAGE_SIZE = 100
+
+# files smaller than this are not precompressed
+COMPRESS_MIN_SIZE = 1024
+
+# logo of the shields.io endpoint badges, see AppRecord.shields_badge
+SHIELDS_LOGO_SVG = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 16.933 16.933" height="64" width="64"><g transform="matrix(.91146 0 0 .91146 -10.218 1.495)"><path d="M14.558-1.295a1.27 1.27 0 00-1.272 1.272v15.602c0 .704.567 1.27 1.272 1.27H26.7c.704 0 1.271-.566 1.271-1.27V1.892l-3.217-3.187zM19.233.349h2.792V3.14h1.483l-2.88 3.257-2.877-3.257h1.482zM20 7.075h1.32l.049.05c.046.047.053.078.118.513.038.254.073.48.078.502.006.026.032.046.075.06.036.013.141.054.233.093l.166.071.4-.3c.427-.319.45-.33.554-.266.079.048.694.66.814.808.088.11.102.136.102.203 0 .084.011.067-.403.602l-.173.224.055.12c.03.067.077.182.104.257l.05.136.479.075c.263.041.497.08.519.087.088.029.094.07.094.744 0 .662-.006.71-.086.743-.018.005-.252.05-.521.089l-.489.074-.033.091c-.018.05-.063.154-.099.231-.053.116-.062.148-.046.182s.238.321.522.677c.025.03.05.085.056.118.008.052-.002.078-.074.173-.192.257-.736.784-.887.861-.06.03-.081.034-.136.015-.036-.01-.227-.148-.426-.304-.339-.267-.363-.282-.408-.264l-.24.098-.193.078-.021.172c-.028.233-.104.7-.128.783a.222.222 0 01-.066.104c-.045.035-.07.04-.699.04h-.651l-.05-.05c-.046-.049-.053-.077-.118-.512-.037-.254-.073-.48-.078-.502-.006-.025-.032-.049-.075-.06a2.83 2.83 0 01-.234-.094l-.166-.072-.368.28c-.202.154-.387.29-.41.302-.089.049-.15.015-.414-.233a6.032 6.032 0 01-.574-.586c-.09-.108-.103-.132-.103-.202 0-.09.005-.096.367-.56l.21-.27-.068-.147a2.858 2.858 0 01-.1-.249.635.635 0 00-.044-.113 5.501 5.501 0 00-.496-.085 4.552 4.552 0 01-.518-.094c-.07-.044-.076-.089-.076-.734 0-.66.006-.707.086-.742.018-.007.252-.047.52-.088l.486-.074.044-.117c.025-.065.07-.174.101-.241l.057-.123-.066-.095a12.025 12.025 0 00-.293-.382 2.895 2.895 0 01-.238-.327c-.014-.056.012-.114.103-.23a7.76 7.76 0 01.697-.703c.159-.128.224-.158.295-.133.029.01.217.147.42.304.345.267.371.284.415.266l.239-.099.192-.077.032-.245c.036-.281.093-.615.119-.705a.302.302 0 01.057-.105zm.664 2.647c-.74 0-1.323.584-1.323 1.323 0 .53.301.996.787 1.216.23.104.55.136.821.08a1.325 1.325 0 00-.285-2.619z" fill="#efefef"/><path d="M20.367 7.08c-.005.025-.014.047-.014.087V8.23a.224.224 0 01-.175.218c-.297.067-.576.19-.829.349a.224.224 0 01-.276-.03l-.756-.755c-.025-.025-.039-.031-.058-.044l-.567.567c.013.02.019.034.044.058l.756.756a.224.224 0 01.029.277c-.16.252-.282.531-.35.828a.224.224 0 01-.218.175h-1.06c-.042 0-.063.01-.088.015v.814c.025.005.046.014.087.014h1.061a.224.224 0 01.219.175c.067.297.189.576.349.829a.224.224 0 01-.03.276l-.755.756c-.025.024-.031.04-.044.058l.567.567c.02-.014.033-.02.058-.044l.756-.756a.224.224 0 01.276-.03c.253.16.532.282.83.35a.224.224 0 01.174.218v1.06c0 .04.009.063.014.088h.815c.005-.024.014-.049.014-.087V13.87a.224.224 0 01.175-.218c.297-.068.576-.19.828-.35a.224.224 0 01.277.03l.756.756c.025.025.038.03.058.044l.567-.567c-.013-.02-.019-.034-.044-.058l-.756-.756a.224.224 0 01-.029-.276 2.66 2.66 0 00.35-.83.224.224 0 01.217-.174h1.062c.04 0 .062-.01.087-.014v-.814c-.025-.006-.047-.015-.087-.015h-1.062a.224.224 0 01-.218-.175 2.662 2.662 0 00-.35-.828.224.224 0 01.03-.277l.756-.756c.025-.025.03-.038.043-.058l-.567-.567c-.019.013-.033.019-.058.044l-.756.756a.224.224 0 01-.276.029 2.662 2.662 0 00-.829-.35.224.224 0 01-.174-.217V7.167c0-.04-.01-.062-.015-.087zm.407 2.457c.834 0 1.513.679 1.513 1.512 0 .834-.679 1.512-1.513 1.512a1.514 1.514 0 01-1.512-1.512c0-.833.679-1.512 1.512-1.512z" style="marker:none" overflow="visible" fill="none"/><path d="M16.696 10.642v.352c0-.18.005-.257.008-.352zm2.713 0a1.322 1.322 0 00.72 1.618c.23.105.55.137.821.08a1.325 1.325 0 001.01-1.009c.05-.242.028-.475-.04-.689zm5.216 0c.004.108.01.186.01.412 0 .662-.006.71-.086.743-.018.005-.252.05-.521.089l-.489.074-.033.091c-.018.05-.063.154-.099.231-.053.116-.062.148-.046.182s.238.321.522.677c.025.03.05.085.056.118.008.052-.002.078-.074.173-.192.257-.736.784-.887.861-.06.03-.081.034-.136.015-.036-.01-.227-.148-.426-.304-.339-.267-.363-.282-.408-.264l-.24.098-.193.078-.021.172c-.028.233-.104.7-.128.783a.222.222 0 01-.066.104c-.045.035-.07.04-.699.04h-.651l-.05-.05c-.046-.049-.053-.077-.118-.512-.037-.254-.073-.48-.078-.502-.006-.025-.032-.049-.075-.06a2.83 2.83 0 01-.234-.094l-.166-.072-.368.28c-.202.154-.387.29-.41.302-.089.049-.15.015-.414-.233a6.032 6.032 0 01-.574-.586c-.09-.108-.103-.132-.103-.202 0-.09.005-.096.367-.56l.21-.27-.068-.147a2.858 2.858 0 01-.1-.249.635.635 0 00-.044-.113 5.501 5.501 0 00-.496-.085 4.552 4.552 0 01-.518-.094c-.068-.043-.074-.111-.075-.688v5.771h7.947v-6.209z" fill="#e6e6e6"/><circle r="1.632" cy="11.103" cx="20.72" fill="#efefef"/><path d="M24.745-1.295V.73a1.15 1.15 0 001.153 1.152h2.065l-.34-.335L25.085-.96z" fill="#bebebe"/></g></svg>'
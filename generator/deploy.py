@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import hashlib
+import json
+import os
+import shutil
+
+from colorama import Fore
+
+from . import __version__
+from .incremental import BUILD_MANIFEST
+from .writers import open_output
+
+DEPLOY_MANIFEST = ".deploy-manifest.json"
+
+# state of the build kept in the output directory, which is not published
+BUILD_STATE_FILES = (DEPLOY_MANIFEST, BUILD_MANIFEST)
+
+
+def file_sha256(path, chunk_size=64 * 1024):
+    """
+    Returns the sha256 hash of the content of the file `path`
+    :param path:
+    :type path: str
+    :param chunk_size:
+    :type chunk_size: int
+    :return:
+    :rtype: str
+    """
+    sha = hashlib.sha256()
+    with open(path, "rb") as r:
+        for chunk in iter(lambda: r.read(chunk_size), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def read_manifest(directory):
+    """
+    Returns the hashes of the files listed by the deploy manifest of
+    `directory`, or None if it has no (valid) manifest
+    :param directory:
+    :type directory: str
+    :return: relative paths (with / separators) and their sha256 hashes
+    :rtype: dict
+    """
+    path = os.path.join(directory, DEPLOY_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as r:
+            return json.load(r)["files"]
+    except (ValueError, KeyError):
+        print("[STATIC] Ignoring malformed {}".format(path))
+        return None
+
+
+def _relative_paths(directory):
+    for path, _, file_names in os.walk(directory):
+        for file_name in file_names:
+            relative_path = os.path.relpath(os.path.join(path, file_name), directory)
+            relative_path = relative_path.replace(os.path.sep, "/")
+            if relative_path not in BUILD_STATE_FILES:
+                yield relative_path
+
+
+class DeployManifest:
+    def __init__(self, output_directory, previous_directory=None):
+        """
+        Lists the files of the output directory with their sha256 hashes,
+        and the files added, changed and removed since the build in
+        `previous_directory`, so that a deployment only has to copy what
+        changed, see apply_delta
+        :param output_directory: root output directory
+        :type output_directory: str
+        :param previous_directory: root output directory of the previous
+        build, e.g the directory the staging directory replaces
+        :type previous_directory: str
+        """
+        self.output_directory = output_directory
+        self.previous_directory = previous_directory
+        self.previous = dict()
+        if previous_directory is not None:
+            self.previous = read_manifest(previous_directory) or dict()
+        self.files = dict()
+
+    def _sha256(self, relative_path):
+        path = os.path.join(self.output_directory, relative_path)
+        previous_sha = self.previous.get(relative_path)
+        if previous_sha is not None:
+            # a hardlink to the file of the previous build has its hash
+            previous_path = os.path.join(self.previous_directory, relative_path)
+            try:
+                if os.path.samefile(path, previous_path):
+                    return previous_sha
+            except FileNotFoundError:
+                pass
+        return file_sha256(path)
+
+    def update(self):
+        """
+        Hashes the files of the output directory
+        :return:
+        :rtype:
+        """
+        self.files = dict(
+            (relative_path, self._sha256(relative_path))
+            for relative_path in sorted(_relative_paths(self.output_directory))
+        )
+
+    @property
+    def added(self):
+        return sorted(set(self.files) - set(self.previous))
+
+    @property
+    def changed(self):
+        return sorted(
+            path
+            for path, sha in self.files.items()
+            if path in self.previous and self.previous[path] != sha
+        )
+
+    @property
+    def removed(self):
+        return sorted(set(self.previous) - set(self.files))
+
+    def write(self):
+        """
+        Writes the manifest to the output directory
+        :return:
+        :rtype:
+        """
+        with open_output(os.path.join(self.output_directory, DEPLOY_MANIFEST)) as w:
+            json.dump(
+                {
+                    "version": __version__,
+                    "files": self.files,
+                    "added": self.added,
+                    "changed": self.changed,
+                    "removed": self.removed,
+                },
+                w,
+                indent=1,
+            )
+        print(
+            "[STATIC] {} files added, {} changed and {} removed since the "
+            "previous build".format(
+                len(self.added), len(self.changed), len(self.removed)
+            )
+        )
+
+
+def _remove_empty_directories(path, root):
+    directory = os.path.dirname(path)
+    while directory != root and not os.listdir(directory):
+        os.rmdir(directory)
+        directory = os.path.dirname(directory)
+
+
+def apply_delta(output_directory, target_directory):
+    """
+    Updates `target_directory`, e.g a checkout of the gh-pages branch, to
+    the build in `output_directory`: the files whose hash differs from the
+    deploy manifest of the target are copied, and the files of the target
+    manifest which are no longer part of the build are removed. A target
+    without a manifest gets all the files, and nothing is removed from it
+    :param output_directory: root output directory of a build
+    :type output_directory: str
+    :param target_directory:
+    :type target_directory: str
+    :return: the number of files copied and removed
+    :rtype: tuple
+    """
+    files = read_manifest(output_directory)
+    if files is None:
+        raise FileNotFoundError(
+            "{} has no {}, build it first".format(output_directory, DEPLOY_MANIFEST)
+        )
+    deployed = read_manifest(target_directory)
+    if deployed is None:
+        print(
+            Fore.YELLOW + "[DEPLOY] {} has no {}, copying all the files "
+            "without removing any".format(target_directory, DEPLOY_MANIFEST),
+            Fore.RESET,
+        )
+        deployed = dict()
+
+    target_directory = os.path.normpath(target_directory)
+    copied = removed = 0
+    for relative_path, sha in files.items():
+        destination = os.path.join(target_directory, relative_path)
+        if deployed.get(relative_path) == sha and os.path.exists(destination):
+            continue
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copy2(
+            os.path.join(output_directory, relative_path),
+            "{}.part".format(destination),
+        )
+        os.replace("{}.part".format(destination), destination)
+        copied += 1
+
+    for relative_path in sorted(set(deployed) - set(files)):
+        destination = os.path.join(target_directory, relative_path)
+        if os.path.exists(destination):
+            os.remove(destination)
+            _remove_empty_directories(destination, target_directory)
+            removed += 1
+
+    shutil.copy2(
+        os.path.join(output_directory, DEPLOY_MANIFEST),
+        os.path.join(target_directory, DEPLOY_MANIFEST),
+    )
+    print(
+        "[DEPLOY] {} files copied to {} and {} removed, {} unchanged".format(
+            copied, target_directory, removed, len(files) - copied
+        )
+    )
+    return copied, removed
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+import sys
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from colorama import Fore
+
+from .cache import ApiCache, prune_releases
+from .constants import GITHUB_API_URL
+from .tokens import RateLimitExceeded, TokenPool
+from .transport import get_transport
+
+
+def get_github_repo(app):
+    """
+    Returns the owner/repo path of a feed.json item if the first link of
+    the item points to GitHub, else None
+    :param app: feed.json item
+    :type app: dict
+    :return:
+    :rtype: str
+    """
+    links = app.get("links")
+    if not links:
+        return None
+    if not links[0].get("type", "").lower() == "github":
+        return None
+    return links[0].get("url")
+
+
+def get_github_release_from(
+    github_release_api, token=None, title="", headers=None, token_pool=None, data=None
+):
+    """
+    Requests github_release_api and returns the urllib response instance,
+    or False if the request failed.
+    The token for the request is taken from token_pool, falling back to
+    `token`. When a token is ratelimited, the request is retried with the
+    next token which has budget left, sleeping until a reset if necessary.
+    The build quits (61) only if no token is reset within the max_wait of
+    the pool.
+    A 304 (Not Modified) response to a conditional request is returned as
+    is, so that the caller can reuse its cached copy
+    :param github_release_api: url to the releases endpoint
+    :type github_release_api: str
+    :param token: GitHub OAuth token
+    :type token: str
+    :param title: Name of the app, used for logging
+    :type title: str
+    :param headers: additional request headers, e.g. If-None-Match
+    :type headers: dict
+    :param token_pool: pool of GitHub OAuth tokens
+    :type token_pool: TokenPool
+    :param data: request body, sent as POST (e.g. GraphQL queries)
+    :type data: bytes
+    :return:
+    :rtype:
+    """
+    if token_pool is None:
+        token_pool = TokenPool([token])
+
+    while True:
+        try:
+            token = token_pool.acquire()
+        except RateLimitExceeded as err:
+            print(Fore.RED + "[STATIC][{}][GH] {}".format(title, err) + Fore.RESET)
+            print("Quitting because of ratelimit")
+            sys.exit(61)
+
+        request = urllib.request.Request(github_release_api, data=data)
+        request.add_header("Authorization", "Bearer {}".format(token))
+        for header, value in (headers or dict()).items():
+            request.add_header(header, value)
+        try:
+            request_url = get_transport().urlopen(request)
+        except urllib.error.HTTPError as err:
+            token_pool.update(token, err.headers)
+            if err.code == 304:
+                return err
+            if err.code in (403, 429) and token_pool.is_ratelimited(err.headers):
+                print(
+                    Fore.YELLOW
+                    + "[STATIC][{}][GH] Token ratelimited, retrying".format(title)
+                    + Fore.RESET
+                )
+                token_pool.exhausted(token, err.headers)
+                continue
+            print(
+                Fore.RED
+                + "[STATIC][{}][GH] Request to {} failed with {}".format(
+                    title, github_release_api, err.code
+                )
+                + Fore.RESET
+            )
+            return False
+        except OSError as err:
+            # URLError (e.g. a connection error or a response which was not
+            # recorded, see ReplayTransport), timeouts and connection resets
+            print(
+                Fore.RED
+                + "[STATIC][{}][GH] Request to {} failed ({})".format(
+                    title, github_release_api, err
+                )
+                + Fore.RESET
+            )
+            return False
+        token_pool.update(token, request_url.headers)
+        break
+
+    status = request_url.status
+    if status != 200:
+        print(
+            Fore.RED
+            + "[STATIC][{}][GH] Request to {} failed with {}".format(
+                title, github_release_api, status
+            )
+            + Fore.RESET
+        )
+        return False
+    return request_url
+
+
+def get_github_api_data(
+    repo, token=None, title="", api_url=GITHUB_API_URL, cache=None, token_pool=None
+):
+    """
+    Gets the releases of `repo` from api.github.com. The pruned releases
+    (see prune_releases) are cached in the api directory, and revalidated with a conditional request once
+    it is older than the max_age of the cache
+    :param repo: owner/repo path
+    :type repo: str
+    :param token: GitHub OAuth token
+    :type token: str
+    :param title: Name of the app, used for logging
+    :type title: str
+    :param api_url: Base url of the GitHub REST api
+    :type api_url: str
+    :param cache: cache of the api responses (defaults to: ./api)
+    :type cache: ApiCache
+    :param token_pool: pool of GitHub OAuth tokens, overrides `token`
+    :type token_pool: TokenPool
+    :return: the pruned releases, or False if they could not be retrieved
+    :rtype:
+    """
+    if cache is None:
+        cache = ApiCache()
+
+    if cache.is_fresh(repo):
+        return cache.read(repo)
+
+    github_release_api = "{api_url}/repos/{path}/releases".format(
+        api_url=api_url, path=repo
+    )
+
+    # get the request urllib response instance or bool
+    request_url = get_github_release_from(
+        github_release_api,
+        token,
+        title,
+        headers=cache.validators(repo),
+        token_pool=token_pool,
+    )
+    # check if request succeeded:
+    if not request_url:
+        return False
+
+    if request_url.code == 304:
+        # the releases did not change since they were cached
+        print("[STATIC][{}][GH] Releases not modified".format(title))
+        cache.revalidated(repo, request_url.headers)
+        return cache.read(repo)
+
+    # attempt to parse the json data with the hope that the data is json,
+    # and cache the parts of it used by the generator
+    try:
+        releases = prune_releases(json.loads(request_url.read().decode()))
+    except (json.decoder.JSONDecodeError, TypeError, AttributeError):
+        return False
+    cache.write(repo, releases, request_url.headers, request_url.status)
+    return releases
+
+
+class ReleaseFetcher:
+    def __init__(self, token_pool, workers=8, api_url=GITHUB_API_URL, cache=None):
+        """
+        Fetches the releases of GitHub hosted apps concurrently, with at
+        most `workers` requests in flight
+        :param token_pool: pool of GitHub OAuth tokens
+        :type token_pool: TokenPool
+        :param workers: number of concurrent requests
+        :type workers: int
+        :param api_url: Base url of the GitHub REST api
+        :type api_url: str
+        :param cache: cache of the api responses (defaults to: ./api)
+        :type cache: ApiCache
+        """
+        self.token_pool = token_pool
+        self.workers = max(1, workers)
+        self.api_url = api_url.rstrip("/")
+        self.cache = cache if cache is not None else ApiCache()
+
+    def prefetch(self, apps):
+        """
+        Prefetches the releases of every GitHub hosted app in `apps`
+        :param apps: feed.json items
+        :type apps: list
+        :return: mapping of owner/repo path to the parsed releases json, or
+        False if the releases could not be retrieved
+        :rtype: dict
+        """
+        repos = dict()
+        for app in apps:
+            repo = get_github_repo(app)
+            if repo and repo not in repos:
+                repos[repo] = app.get("name", "")
+
+        print(
+            "[UPSTREAM] Fetching releases of {} repositories with {} "
+            "workers".format(len(repos), self.workers)
+        )
+        if not self.token_pool:
+            # no token, no assets are crawled; see AppImage.github
+            return dict()
+        return self.fetch(repos)
+
+    def fetch(self, repos):
+        """
+        Fetches the releases of `repos` from the REST api, one request per
+        repository
+        :param repos: mapping of owner/repo path to the name of the app
+        :type repos: dict
+        :return:
+        :rtype: dict
+        """
+        results = self.map(
+            lambda job: get_github_api_data(
+                job[0],
+                title=job[1],
+                api_url=self.api_url,
+                cache=self.cache,
+                token_pool=self.token_pool,
+            ),
+            repos.items(),
+        )
+        return dict(zip(repos, results))
+
+    def map(self, function, jobs):
+        """
+        Calls `function` on each of `jobs` in the thread pool and returns the
+        results in the order of `jobs`
+        :param function: callable which accepts a job
+        :type function: callable
+        :param jobs: iterable of jobs
+        :type jobs: iterable
+        :return:
+        :rtype: list
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(function, job) for job in jobs]
+            try:
+                return [future.result() for future in futures]
+            except BaseException:
+                # a worker quit the build (e.g. ratelimit),
+                # do not start the pending requests
+                for future in futures:
+                    future.cancel()
+                raise
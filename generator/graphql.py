@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+
+from colorama import Fore
+
+from .cache import prune_releases
+from .constants import GITHUB_API_URL
+from .fetcher import ReleaseFetcher, get_github_release_from
+
+RELEASES_QUERY = """{alias}: repository(owner: {owner}, name: {name}) {{
+    releases(first: {releases}, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+      nodes {{
+        tagName
+        url
+        isPrerelease
+        publishedAt
+        author {{ login }}
+        releaseAssets(first: 100) {{ nodes {{ name downloadUrl size }} }}
+      }}
+    }}
+  }}"""
+
+
+def build_releases_query(repos, releases=10):
+    """
+    Builds a GraphQL query which requests the latest `releases` of all the
+    `repos` at once. Each repository is aliased as r<index> in the response
+    :param repos: list of owner/repo paths
+    :type repos: list
+    :param releases: number of releases to request per repository
+    :type releases: int
+    :return:
+    :rtype: str
+    """
+    fields = list()
+    for i, repo in enumerate(repos):
+        owner, _, name = repo.partition("/")
+        fields.append(
+            RELEASES_QUERY.format(
+                alias="r{}".format(i),
+                owner=json.dumps(owner),
+                name=json.dumps(name),
+                releases=releases,
+            )
+        )
+    return "query {\n  " + "\n  ".join(fields) + "\n}"
+
+
+def to_rest_release(node):
+    """
+    Converts a release node of the GraphQL api to the shape of a release
+    of the REST api (repos/{path}/releases), limited to the fields read
+    by AppImage.get_github_info
+    :param node: release node
+    :type node: dict
+    :return:
+    :rtype: dict
+    """
+    author = node.get("author")
+    return {
+        "tag_name": node.get("tagName"),
+        "html_url": node.get("url"),
+        "prerelease": node.get("isPrerelease"),
+        "published_at": node.get("publishedAt"),
+        "author": {"login": author.get("login")} if author else None,
+        "assets": [
+            {
+                "name": asset.get("name"),
+                "browser_download_url": asset.get("downloadUrl"),
+                "size": asset.get("size"),
+            }
+            for asset in node.get("releaseAssets", dict()).get("nodes", [])
+        ],
+    }
+
+
+class GraphQLReleaseFetcher(ReleaseFetcher):
+    def __init__(
+        self,
+        token_pool,
+        workers=8,
+        api_url=GITHUB_API_URL,
+        cache=None,
+        batch_size=50,
+        releases=10,
+    ):
+        """
+        Fetches the releases of GitHub hosted apps with the GraphQL api,
+        `batch_size` repositories per request. Only the latest `releases`
+        of each repository and the fields used by the generator are
+        requested
+        :param batch_size: number of repositories per query
+        :type batch_size: int
+        :param releases: number of releases to request per repository
+        :type releases: int
+        """
+        super().__init__(token_pool, workers=workers, api_url=api_url, cache=cache)
+        self.batch_size = max(1, batch_size)
+        self.releases = releases
+
+    def fetch(self, repos):
+        """
+        Fetches the releases of `repos` from the GraphQL api. Repositories
+        with a fresh cached response are not requested again
+        :param repos: mapping of owner/repo path to the name of the app
+        :type repos: dict
+        :return:
+        :rtype: dict
+        """
+        releases = dict()
+        stale = list()
+        for repo in repos:
+            if self.cache.is_fresh(repo):
+                releases[repo] = self.cache.read(repo)
+            else:
+                stale.append(repo)
+
+        batches = [
+            stale[i : i + self.batch_size]
+            for i in range(0, len(stale), self.batch_size)
+        ]
+        print(
+            "[UPSTREAM] Querying {} repositories in {} GraphQL requests".format(
+                len(stale), len(batches)
+            )
+        )
+        for batch_releases in self.map(self.fetch_batch, batches):
+            releases.update(batch_releases)
+        return releases
+
+    def fetch_batch(self, repos):
+        """
+        Fetches the releases of a batch of `repos` in a single query
+        :param repos: list of owner/repo paths
+        :type repos: list
+        :return: mapping of owner/repo path to the list of releases in the
+        shape of the REST api, or False if they could not be retrieved
+        :rtype: dict
+        """
+        query = build_releases_query(repos, releases=self.releases)
+        url = "{}/graphql".format(self.api_url)
+        request_url = get_github_release_from(
+            url,
+            title="GraphQL",
+            headers={"Content-Type": "application/json"},
+            token_pool=self.token_pool,
+            data=json.dumps({"query": query}).encode(),
+        )
+        if not request_url:
+            return dict((repo, False) for repo in repos)
+
+        response = request_url.read()
+        try:
+            response = json.loads(response.decode())
+        except json.decoder.JSONDecodeError:
+            return dict((repo, False) for repo in repos)
+
+        # errors of the whole query (e.g. ratelimited, query too complex)
+        # come without data, the repositories which do not exist as
+        # NOT_FOUND errors next to the data of the others
+        for error in response.get("errors") or ():
+            if error.get("type") != "NOT_FOUND":
+                print(
+                    Fore.RED
+                    + "[STATIC][GraphQL][GH] {}".format(error.get("message"))
+                    + Fore.RESET
+                )
+        data = response.get("data")
+        if data is None:
+            return dict((repo, False) for repo in repos)
+
+        releases = dict()
+        for i, repo in enumerate(repos):
+            repository = data.get("r{}".format(i))
+            if repository is None:
+                # the repository does not exist, or is not accessible
+                print(
+                    Fore.RED
+                    + "[STATIC][{}][GH] Repository not found".format(repo)
+                    + Fore.RESET
+                )
+                releases[repo] = False
+                continue
+            releases[repo] = prune_releases(
+                to_rest_release(node) for node in repository["releases"]["nodes"]
+            )
+            # the releases of the query replace the cached ones along with
+            # the validators of a previous REST request, since they only
+            # hold the latest releases
+            self.cache.write(repo, releases[repo], dict())
+        return releases
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import hashlib
+import json
+import os
+
+from . import __version__
+from .utils import digest
+from .writers import open_output
+
+BUILD_MANIFEST = ".build-manifest.json"
+
+
+def get_source_version():
+    """
+    Returns a hash of the sources of the generator package, which changes
+    with the code of the generator even when __version__ does not
+    :return:
+    :rtype: str
+    """
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+    sha = hashlib.sha256()
+    for directory, directory_names, file_names in os.walk(package_directory):
+        directory_names.sort()
+        for file_name in sorted(file_names):
+            if not file_name.endswith(".py"):
+                continue
+            path = os.path.join(directory, file_name)
+            sha.update(os.path.relpath(path, package_directory).encode())
+            with open(path, "rb") as r:
+                sha.update(r.read())
+    return sha.hexdigest()
+
+
+def get_template_version(templates, templates_directory):
+    """
+    Returns a hash of the app page templates, the templates they include
+    and the version and sources of the generator. An app page must be
+    rendered again when this changes
+    :param templates: template strings used to render an app page
+    :type templates: iterable
+    :param templates_directory: directory of the jinja2 FileSystemLoader
+    :type templates_directory: str
+    :return:
+    :rtype: str
+    """
+    sha = hashlib.sha256(__version__.encode())
+    sha.update(get_source_version().encode())
+    for template in templates:
+        sha.update(template.encode())
+    if os.path.isdir(templates_directory):
+        for file_name in sorted(os.listdir(templates_directory)):
+            with open(os.path.join(templates_directory, file_name), "rb") as r:
+                sha.update(file_name.encode())
+                sha.update(r.read())
+    return sha.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path):
+        """
+        Keeps the hashes of the inputs of every app page of the previous
+        build (feed.json item, releases, templates), so that unchanged app
+        pages are not rendered again
+        :param path: path to the manifest
+        :type path: str
+        """
+        self.path = path
+        self.previous = dict()
+        self.current = dict()
+        # the version of the pages listing all the apps (app list,
+        # categories, json api, search index, sitemaps), see
+        # set_aggregate_version
+        self.previous_aggregate = None
+        self.aggregate = None
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as r:
+                    data = json.load(r)
+                self.previous = data.get("apps", dict())
+                self.previous_aggregate = data.get("aggregate")
+            except ValueError:
+                print("[STATIC] Ignoring malformed {}".format(path))
+
+    @staticmethod
+    def entry(app, releases, template_version):
+        return {
+            "feed": digest(app),
+            "releases": digest(releases),
+            "template": template_version,
+        }
+
+    def is_unchanged(self, folder, entry):
+        """
+        Checks if `folder` was built from the same inputs in the
+        previous build
+        :param folder: name of the app folder
+        :type folder: str
+        :param entry: BuildManifest.entry of the app
+        :type entry: dict
+        :return:
+        :rtype: bool
+        """
+        return self.previous.get(folder) == entry
+
+    def set_aggregate_version(self, version):
+        """
+        Sets the hash of the templates and options the pages listing all
+        the apps are built from. They must be built again when it changes,
+        even if no app did
+        :param version:
+        :type version: str
+        :return:
+        :rtype:
+        """
+        self.aggregate = version
+
+    def update(self, folder, entry):
+        self.current[folder] = entry
+
+    def removed(self):
+        """
+        Returns the app folders of the previous build which are not part
+        of the current build
+        :return:
+        :rtype: list
+        """
+        return sorted(set(self.previous) - set(self.current))
+
+    @property
+    def changed(self):
+        return (
+            self.previous != self.current or self.previous_aggregate != self.aggregate
+        )
+
+    def write(self):
+        with open_output(self.path) as w:
+            json.dump(
+                {
+                    "version": __version__,
+                    "aggregate": self.aggregate,
+                    "apps": self.current,
+                },
+                w,
+            )
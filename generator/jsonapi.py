@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import hashlib
+import os
+import shutil
+
+from .constants import CATEGORIES, JSON_API_PAGE_SIZE
+from .writers import write_json
+
+# relative to the output directory
+JSON_API_DIRECTORY = os.path.join("api", "v1")
+JSON_API_VERSION = 1
+
+# markup only used by the html pages
+_HTML_FIELDS = ("categories_html",)
+
+
+def get_detail_path(output_directory, folder):
+    """
+    Returns the path of the detail endpoint of the app in `folder`
+    :param output_directory: root output directory
+    :type output_directory: str
+    :param folder: name of the app folder, see render.get_app_folder
+    :type folder: str
+    :return:
+    :rtype: str
+    """
+    return os.path.join(
+        output_directory, JSON_API_DIRECTORY, "apps", "{}.json".format(folder)
+    )
+
+
+def write_app_detail(output_directory, record, metadata):
+    """
+    Writes the detail endpoint of an app: its index.min.json record and
+    its releases (AppImage.get_app_metadata, i.e core.json)
+    :param output_directory: root output directory
+    :type output_directory: str
+    :param record: index.min.json record of the app
+    :type record: dict
+    :param metadata: AppImage.get_app_metadata()
+    :type metadata: dict
+    :return:
+    :rtype:
+    """
+    detail = get_list_record(record)
+    path = get_detail_path(output_directory, detail["folder"])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    detail["releases"] = metadata
+    write_json(path, detail)
+
+
+def remove_app_detail(output_directory, folder):
+    path = get_detail_path(output_directory, folder)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def get_list_record(record):
+    """
+    Returns the entry of an app in the list pages
+    :param record: index.min.json record
+    :type record: dict
+    :return:
+    :rtype: dict
+    """
+    data = dict((k, v) for k, v in record.items() if k not in _HTML_FIELDS)
+    # the name is html escaped already, see render.get_app_folder
+    folder = record.get("name", "").lower()
+    data["folder"] = folder
+    data["detail"] = "apps/{}.json".format(folder)
+    return data
+
+
+class JsonApiBuilder:
+    def __init__(self, output_directory, page_size=JSON_API_PAGE_SIZE):
+        """
+        Writes the static JSON api in api/v1, which lets clients fetch a
+        page of the catalog instead of index.min.json:
+
+        * apps/page/<n>.json: the apps, `page_size` per page
+        * categories/<category>/page/<n>.json: the apps of a category
+        * apps/<folder>.json: the detail endpoint of an app, written by
+          the renderer (write_app_detail)
+        * index.json: the counts of all the lists and the sha256 of every
+          page, so that clients can tell which pages changed
+        :param output_directory: root output directory
+        :type output_directory: str
+        :param page_size: number of apps per page
+        :type page_size: int
+        """
+        self.directory = os.path.join(output_directory, JSON_API_DIRECTORY)
+        self.page_size = max(1, page_size)
+        self.apps = list()
+        self.categories = dict((x, []) for x in CATEGORIES)
+
+    def add(self, record):
+        """
+        Adds an index.min.json record to the lists
+        :param record:
+        :type record: dict
+        :return:
+        :rtype:
+        """
+        data = get_list_record(record)
+        self.apps.append(data)
+        for category in sorted(set(record.get("categories") or ())):
+            # invalid desktop categories have no category pages either
+            if category in self.categories:
+                self.categories[category].append(data)
+
+    def _write_pages(self, directory, apps):
+        """
+        Writes the pages of a list, and returns its manifest entry
+        """
+        os.makedirs(os.path.join(self.directory, directory), exist_ok=True)
+        pages = list()
+        count = -(-len(apps) // self.page_size)
+        for page in range(count):
+            path = "{}/{}.json".format(directory, page)
+            data = {
+                "page": page,
+                "pages": count,
+                "count": len(apps),
+                "apps": apps[page * self.page_size : (page + 1) * self.page_size],
+            }
+            write_json(os.path.join(self.directory, path), data)
+            with open(os.path.join(self.directory, path), "rb") as r:
+                sha256 = hashlib.sha256(r.read()).hexdigest()
+            pages.append({"path": path, "sha256": sha256})
+
+        # remove the pages of a previous build which had more apps
+        names = set("{}.json".format(page) for page in range(count))
+        for file_name in os.listdir(os.path.join(self.directory, directory)):
+            if file_name not in names:
+                os.remove(os.path.join(self.directory, directory, file_name))
+        return {"count": len(apps), "pages": pages}
+
+    def write(self):
+        """
+        Writes the lists and index.json
+        :return:
+        :rtype:
+        """
+        manifest = {
+            "version": JSON_API_VERSION,
+            "page_size": self.page_size,
+            "apps": self._write_pages("apps/page", self.apps),
+            "categories": dict(),
+        }
+        for category, apps in self.categories.items():
+            directory = "categories/{}/page".format(category.lower())
+            if apps:
+                manifest["categories"][category] = self._write_pages(directory, apps)
+            elif os.path.exists(os.path.join(self.directory, directory)):
+                shutil.rmtree(os.path.join(self.directory, os.path.dirname(directory)))
+
+        write_json(os.path.join(self.directory, "index.json"), manifest)
+        print(
+            "[STATIC] Wrote the JSON api of {} apps ({} pages)".format(
+                len(self.apps), len(manifest["apps"]["pages"])
+            )
+        )
@@ -28,101 +28,257 @@ This file is part of AppImage Catalog Generator
 
 import sys
 import os
-import time
-import urllib.request
+import shutil
+from urllib.parse import quote
 import json
-from copy import copy
 
-import mistune
-from jinja2 import Environment, FileSystemLoader
 from colorama import init as colorama_init
 from colorama import Fore
-from progressbar import progressbar
 
-from generator.appimage.card import Card
 from .cli import parse_args, version
-from .constants import (
-    CARD_TEMPLATE,
-    APPTEMPLATE,
-    CATEGORIES,
-    SITEMAP_URL,
-    SITEMAP_HEADER,
-    APPTEMPLATE_MD,
-)
+from .constants import CATEGORIES
 from .utils import (
     ask_to_remove,
-    copytree,
+    confirm_removal,
     read_parse_and_write_template,
-    get_github_token,
+    get_github_tokens,
 )
-from .appimage import AppImage
 from .catalog import Catalog
-
-# parse arguments
-args = parse_args()
+from .assets import sync_assets
+from .cache import ApiCache
+from .deploy import DeployManifest, apply_delta
+from .jsonapi import JsonApiBuilder, remove_app_detail
+from .incremental import BUILD_MANIFEST, BuildManifest, get_template_version
+from .search import SearchIndexBuilder
+from .sitemap import SitemapBuilder
+from .store import CatalogStore
+from .writers import JsonArrayWriter, open_output
+from .report import report
+from .tokens import TokenPool
+
+# modules which import jinja2, mistune, dateutil, progressbar or
+# urllib.request are imported by the stages which need them, so that
+# importing the generator (or --version) stays cheap
 
 
 class LibraryBuilder:
-    def __init__(
-        self,
-        output_directory=args.output_directory,
-        input_directory=args.input_directory,
-    ):
+    def __init__(self, output_directory=None, input_directory=None, args=None):
         """
         Handles building the appimage catalog
-        :param output_directory:
+        :param output_directory: (defaults to: args.output_directory)
         :type output_directory:
+        :param input_directory: (defaults to: args.input_directory)
+        :type input_directory:
+        :param args: parsed command line arguments (defaults to: the
+        defaults of the command line)
+        :type args: argparse.Namespace
         """
+        self.args = args if args is not None else parse_args([])
         self.data = dict()
         self.apps = dict()
-        self.json = list()
-        self.output_directory = output_directory
-        self.file_system_loader = FileSystemLoader(
-            os.path.join(input_directory, "static", "templates")
+        # the apps, releases and index records kept between builds
+        self.store = CatalogStore(self.args.store)
+        self.output_directory = output_directory or self.args.output_directory
+        # the directory the build writes to, see stage_output
+        self.staging = None
+        # set to False when no app changed since the last (incremental) build
+        self.changed = True
+        self.input_directory = input_directory or self.args.input_directory
+        self._templates = None
+        self._cards = None
+
+    @property
+    def templates(self):
+        """
+        Returns the template registry, created on first use
+        :return:
+        :rtype: generator.templates.TemplateRegistry
+        """
+        if self._templates is None:
+            from .templates import TemplateRegistry
+
+            self._templates = TemplateRegistry(
+                self.input_directory, cache_directory=self.args.template_cache
+            )
+        return self._templates
+
+    @property
+    def cards(self):
+        """
+        Returns the card cache shared by the app list and the categories,
+        created on first use
+        :return:
+        :rtype: generator.cards.CardCache
+        """
+        if self._cards is None:
+            from .cards import CardCache
+
+            self._cards = CardCache(self.templates, self.store)
+        return self._cards
+
+    def sitemap(self, section):
+        """
+        Returns a SitemapBuilder for a section of the catalog
+        :param section: name of the section
+        :type section: str
+        :return:
+        :rtype: SitemapBuilder
+        """
+        return SitemapBuilder(
+            self.output_directory,
+            Catalog().url,
+            section,
+            max_urls=self.args.sitemap_max_urls,
+        )
+
+    def page_url(self, directory):
+        """
+        Returns the url of the page generated in `directory`
+        :param directory: directory inside the output directory
+        :type directory: str
+        :return:
+        :rtype: str
+        """
+        path = os.path.relpath(directory, self.output_directory)
+        if path == os.curdir:
+            return "{}/".format(Catalog().url)
+        return "{}/{}/".format(Catalog().url, quote(path.replace(os.path.sep, "/")))
+
+    def stage_output(self):
+        """
+        Redirects the build to a staging directory, which replaces the
+        output directory in publish_output. The staging directory starts
+        from the previous build, unless the app pages are built from scratch
+        :return:
+        :rtype:
+        """
+        from .staging import StagingDirectory
+
+        seed = self.args.incremental or not self.args.generate_app_pages
+        if (
+            not seed
+            and not self.args.noconfirm
+            and os.path.exists(self.output_directory)
+        ):
+            confirm_removal(self.output_directory)
+        self.staging = StagingDirectory(
+            self.output_directory, siblings=self.args.precompress
         )
+        self.staging.prepare(seed=seed)
+        self.output_directory = self.staging.path
+
+    def publish_output(self):
+        """
+        Moves the staging directory in place of the output directory
+        :return:
+        :rtype:
+        """
+        self.output_directory = self.staging.swap()
+        self.staging = None
+
+    def write_deploy_manifest(self):
+        """
+        Writes the hashes of the output files, and the files added, changed
+        and removed since the previous build, see deploy.DeployManifest
+        :return:
+        :rtype:
+        """
+        previous_directory = None
+        if self.staging is not None:
+            previous_directory = self.staging.output_directory
+        manifest = DeployManifest(self.output_directory, previous_directory)
+        manifest.update()
+        manifest.write()
 
     def write_json_index(self):
         """
-        Write JSON index file
+        Write JSON index file, the search index and the JSON api from the
+        index records of the store, sorted by name
         :return:
         :rtype:
         """
-        with open(os.path.join(self.output_directory, "index.min.json"), "w") as w:
-            json.dump(self.json, w)
+        search_index = SearchIndexBuilder(self.output_directory)
+        json_api = JsonApiBuilder(self.output_directory, self.args.api_page_size)
+        with JsonArrayWriter(
+            os.path.join(self.output_directory, "index.min.json")
+        ) as index_writer:
+            for record in self.store.records(order_by_name=True):
+                index_writer.write(record)
+                search_index.add(record)
+                json_api.add(record)
+        search_index.write()
+        json_api.write()
 
     def set_json(self, path):
         """
-        sets the self.json to the data from `path`
+        Replaces the index records in the store with the records of the
+        JSON file at `path`
         :param path:
         :type path:
         :return:
         :rtype:
         """
-        with open(path, "r") as r:
-            self.json = json.load(r)
+        with open(path, "r") as r, self.store.record_writer() as record_writer:
+            for record in json.load(r):
+                record_writer.write(record)
 
     def fetch_feed_json(self, force_refresh=False):
         """
         Fetches information from --feed-json and returns the json data
-        as python dictionary
+        as python dictionary. The feed of the store is revalidated with a
+        conditional request (unless `force_refresh`), and used as is when
+        the feed did not change or could not be fetched
         :return:
         :rtype:
         """
-        if not os.path.exists(self.output_directory):
-            self.create_root_directory(self.output_directory)
+        import urllib.error
+        import urllib.request
 
-        if not force_refresh and os.path.exists(
-            os.path.join(self.output_directory, "feed.json")
-        ):
-            print("[UPSTREAM] Cached feed.json found <=>. ")
-            with open(os.path.join(self.output_directory, "feed.json"), "r") as r:
-                self.data = json.loads(r.read())
-                self.apps = self.data.get("items", dict())
-                return
+        from .transport import get_transport
+
+        if not os.path.exists(self.output_directory):
+            self.create_root_directory(
+                self.output_directory, noconfirm=self.args.noconfirm
+            )
 
-        print("[UPSTREAM] Fetching latest feed.json: {}".format(args.feed_json))
-        with urllib.request.urlopen(args.feed_json) as url:
-            data = json.loads(url.read().decode())
+        cached = self.store.has_apps()
+        request = urllib.request.Request(self.args.feed_json)
+        if cached and not force_refresh:
+            meta = self.store.fetch_meta(self.args.feed_json)
+            if meta.get("etag"):
+                request.add_header("If-None-Match", meta["etag"])
+            if meta.get("last_modified"):
+                request.add_header("If-Modified-Since", meta["last_modified"])
+
+        print("[UPSTREAM] Fetching latest feed.json: {}".format(self.args.feed_json))
+        try:
+            with get_transport().urlopen(request) as url:
+                data = json.loads(url.read().decode())
+                self.store.fetched(self.args.feed_json, url.headers, url.status)
+        except urllib.error.HTTPError as err:
+            if not cached:
+                raise
+            if err.code == 304:
+                print("[UPSTREAM] Cached feed.json is up to date <=>. ")
+                self.store.fetched(self.args.feed_json, err.headers, err.code)
+            else:
+                print(
+                    Fore.YELLOW + "[UPSTREAM] Fetching feed.json failed with {}, "
+                    "using the cached feed.json".format(err.code),
+                    Fore.RESET,
+                )
+            self.use_cached_feed()
+            return
+        except (OSError, ValueError) as err:
+            if not cached:
+                raise
+            print(
+                Fore.YELLOW + "[UPSTREAM] Fetching feed.json failed ({}), using "
+                "the cached feed.json".format(err),
+                Fore.RESET,
+            )
+            self.use_cached_feed()
+            return
 
         get_appimage_feed_json = os.path.join("database", "get_appimage.json")
         if os.path.exists(get_appimage_feed_json):
@@ -132,27 +288,42 @@ class LibraryBuilder:
             data2 = dict()
         self.data = {**data, **data2}
         self.apps = self.data.get("items", dict())
-        with open(os.path.join(self.output_directory, "feed.json"), "w") as w:
-            json.dump(data, w)
+        added, changed, removed = self.store.update_apps(self.apps)
+        print(
+            "[UPSTREAM] {} apps: {} added, {} changed, {} removed since the "
+            "last fetch".format(len(self.apps), added, changed, removed)
+        )
+
+    def use_cached_feed(self):
+        """
+        Reads the apps of the feed.json fetched by a previous build from
+        the store
+        :return:
+        :rtype:
+        """
+        self.apps = self.store.apps()
+        self.data = {"items": self.apps}
 
     @staticmethod
-    def create_root_directory(output_directory):
+    def create_root_directory(output_directory, noconfirm=False):
         """
         Creates the output directory if it does not exists. If it exists,
         then prompt the user for confirmation in removing the root output
         directory.
         :param output_directory:
         :type output_directory:
+        :param noconfirm:
+        :type noconfirm:
         :return:
         :rtype:
         """
-        ask_to_remove(output_directory, noconfirm=args.noconfirm)
+        ask_to_remove(output_directory, noconfirm=noconfirm)
         os.makedirs(output_directory)
 
     def create_static_directories(self, output_directory):
         """
-        Creates the 'css', 'img' and 'js' directories, copies the files
-        recursively to the destination directory
+        Copies the 'css', 'img', 'js', 'search', 'badges' and 'favicon'
+        directories to the destination directory, see assets.sync_assets
 
         Reads the $ROOT/index.html and formats them following specifications
         from the Catalog instance
@@ -163,28 +334,19 @@ class LibraryBuilder:
         :rtype:
         """
 
-        for directory in ("css", "img", "js", "search", "badges", "favicon"):
-            print("[STATIC] Copying {}".format(directory))
-            directory_abspath = os.path.abspath(os.path.join("static", directory))
-            output_directory_abspath = os.path.abspath(
-                os.path.join(output_directory, directory)
-            )
-
-            # create directories
-            if not os.path.exists(output_directory_abspath):
-                os.makedirs(output_directory_abspath)
-            copytree(directory_abspath, output_directory_abspath)
+        sync_assets(
+            self.templates.assets, output_directory, minify=self.args.minify_assets
+        )
 
         # Read the index.html jinja2 template and parse them
         # with the values from Catalog Object
-        index_html_template_path = os.path.abspath(os.path.join("static", "index.html"))
         index_html_parsed_output_path = os.path.abspath(
             os.path.join(output_directory, "index.html")
         )
 
         read_parse_and_write_template(
-            self.file_system_loader,
-            index_html_template_path,
+            self.templates,
+            "index.html",
             index_html_parsed_output_path,
             catalog=Catalog(),
             path_prefix=".",
@@ -193,114 +355,179 @@ class LibraryBuilder:
 
         # Read the search.html jinja2 template and parse them
         # with the values from Catalog Object
-        search_html_template_path = os.path.abspath(
-            os.path.join("static", "search", "index.html")
-        )
         search_html_parsed_output_path = os.path.abspath(
             os.path.join(output_directory, "search", "index.html")
         )
         read_parse_and_write_template(
-            self.file_system_loader,
-            search_html_template_path,
+            self.templates,
+            "search/index.html",
             search_html_parsed_output_path,
             catalog=Catalog(),
             path_prefix="..",
         )
 
+        with self.sitemap("pages") as sitemap:
+            sitemap.add(self.page_url(output_directory), changefreq="daily")
+            sitemap.add(
+                self.page_url(os.path.join(output_directory, "search")),
+                changefreq="weekly",
+            )
+
     def generate_app_pages(self):
+        from .fetcher import ReleaseFetcher, get_github_repo
+        from .graphql import GraphQLReleaseFetcher
+        from .render import get_app_folder, render_apps
+
         # create all directories
-        self.create_root_directory(self.output_directory)
-        appimage_template = Environment(loader=self.file_system_loader).from_string(
-            APPTEMPLATE
+        if self.args.incremental or self.staging is not None:
+            # keep the app pages of the previous build, or write to the
+            # staging directory prepared by stage_output
+            os.makedirs(self.output_directory, exist_ok=True)
+        else:
+            self.create_root_directory(
+                self.output_directory, noconfirm=self.args.noconfirm
+            )
+        manifest = BuildManifest(os.path.join(self.output_directory, BUILD_MANIFEST))
+        template_version = get_template_version(
+            (
+                self.templates.source("app/app.html"),
+                self.templates.source("app/app.md"),
+                self.templates.assets.digest(),
+            ),
+            self.templates.templates_directory,
         )
-        appimage_data_template = Environment(
-            loader=self.file_system_loader
-        ).from_string(mistune.html(APPTEMPLATE_MD))
-        sitemap_content = []
-        current_formatted_time = time.strftime("%Y-%m-%d")
-
-        # iterate and generate app pages
-        for app in progressbar(self.apps, redirect_stdout=True):
-            appimage = AppImage(app, token=get_github_token(args))
-            path_to_appfolder = os.path.join(
-                self.output_directory, appimage.title.lower()
+        manifest.set_aggregate_version(
+            get_template_version(
+                (
+                    template_version,
+                    self.templates.source("index.html"),
+                    self.templates.source("all/index.html"),
+                    self.templates.source("categories/index.html"),
+                    self.templates.source("search/index.html"),
+                    str(self.args.api_page_size),
+                    str(self.args.sitemap_max_urls),
+                ),
+                self.templates.templates_directory,
             )
-
-            # make the app folder
-            if os.path.exists(path_to_appfolder):
-                print(
-                    Fore.YELLOW
-                    + "[STATIC][{}] Directory exists.".format(appimage.title)
-                    + Fore.RESET
-                )
-            else:
-                os.makedirs(path_to_appfolder)
-
-            # write html file
-            print(
-                Fore.GREEN
-                + "[STATIC][{}] Processing HTML files.".format(appimage.title)
-                + Fore.RESET
+        )
+        # fetch the releases of all the apps before rendering
+        tokens = get_github_tokens(self.args)
+        token_pool = TokenPool(tokens, max_wait=self.args.ratelimit_max_wait)
+        cache = ApiCache(self.store, max_age=self.args.api_cache_ttl)
+        cache.import_legacy()
+        if self.args.github_backend == "graphql":
+            fetcher = GraphQLReleaseFetcher(
+                token_pool=token_pool,
+                workers=self.args.workers,
+                api_url=self.args.github_api_url,
+                cache=cache,
+                batch_size=self.args.graphql_batch_size,
+                releases=self.args.graphql_releases,
             )
-
-            with open(os.path.join(path_to_appfolder, "index.html"), "w") as w:
-                w.write(
-                    appimage_template.render(
-                        appimage=appimage,
-                        catalog=Catalog(),
-                        content=appimage_data_template.render(appimage=appimage),
-                    )
-                )
-            _app_sitemap_local = SITEMAP_URL.format(
-                url=f"{Catalog().url}/{appimage.title_formatted}",
-                lastmod=current_formatted_time,
-                changefreq="weekly",
+        else:
+            fetcher = ReleaseFetcher(
+                token_pool=token_pool,
+                workers=self.args.workers,
+                api_url=self.args.github_api_url,
+                cache=cache,
             )
-            sitemap_content.append(_app_sitemap_local)
+        with report.stage("app_pages.releases"):
+            releases = fetcher.prefetch(self.apps)
 
-            self.json.append(appimage.json_data())
-            with open(os.path.join(path_to_appfolder, "core.json"), "w") as w:
-                json.dump(appimage.get_app_metadata(), w)
-            shields_badge = appimage.shields_badge()
-            with open(os.path.join(path_to_appfolder, "shields.json"), "w") as w:
-                json.dump(shields_badge, w)
-
-        # write json file
-        self.write_json_index()
+        # an app folder shared by more than one app is written by the last
+        # of them, since it would overwrite the others
+        last_app_of_folder = dict(
+            (get_app_folder(app), i) for i, app in enumerate(self.apps)
+        )
 
-        with open(os.path.join(self.output_directory, "sitemap.xml"), "w") as w:
-            w.write(SITEMAP_HEADER.format(content="".join(sitemap_content)))
-        print("writing sitemap.xml completed successfully")
+        # decide which app pages have to be rendered
+        jobs = list()
+        for i, app in enumerate(self.apps):
+            folder = get_app_folder(app)
+            github_api_data = releases.get(get_github_repo(app))
+            if last_app_of_folder[folder] != i:
+                jobs.append((app, github_api_data, False))
+                continue
+
+            # skip the apps whose inputs did not change since the last build
+            manifest_entry = manifest.entry(app, github_api_data, template_version)
+            unchanged = (
+                self.args.incremental
+                and manifest.is_unchanged(folder, manifest_entry)
+                and os.path.exists(
+                    os.path.join(self.output_directory, folder, "index.html")
+                )
+            )
+            manifest.update(folder, manifest_entry)
+            if unchanged:
+                print("[STATIC][{}] Unchanged.".format(app.get("name")))
+            report.count("apps.unchanged" if unchanged else "apps.rendered")
+            jobs.append((app, github_api_data, not unchanged))
+
+        # iterate and generate app pages, streaming the index records to the
+        # store as the apps are rendered. index.min.json and the sitemap
+        # list the apps sorted by name rather than in the order of the feed,
+        # so that the same apps always give the same files
+        with self.store.record_writer() as record_writer, self.sitemap(
+            "apps"
+        ) as sitemap:
+            for json_data, sitemap_entry in render_apps(
+                jobs,
+                workers=self.args.render_workers,
+                templates=self.templates,
+                input_directory=self.input_directory,
+                template_cache=self.args.template_cache,
+                output_directory=self.output_directory,
+                token=next(iter(tokens), None),
+            ):
+                url, lastmod = sitemap_entry
+                record_writer.write(json_data, url=url, lastmod=lastmod)
+            for url, lastmod in self.store.sitemap_entries():
+                sitemap.add(url, lastmod=lastmod)
+
+            for folder in manifest.removed():
+                print("[STATIC][{}] Removing app folder.".format(folder))
+                shutil.rmtree(os.path.join(self.output_directory, folder), True)
+                remove_app_detail(self.output_directory, folder)
+            manifest.write()
+
+            if self.args.incremental and not manifest.changed:
+                # index.min.json, the sitemaps and the app list / categories
+                # of the previous build are still up to date
+                print("[STATIC] No app changed since the last build.")
+                self.changed = False
+                record_writer.abort()
+                sitemap.abort()
+
+        if self.changed:
+            self.write_json_index()
+            print("writing sitemap.xml completed successfully")
+
+        token_pool.report()
 
     def generate_categories_pages(self):
+        if not self.changed:
+            print("Categories list is up to date")
+            return
         print("Generating Categories list")
         categories_list_directory_path = os.path.join(
             self.output_directory, "categories"
         )
 
-        print("[STATIC] Reading index.html template")
-        index_html_path = os.path.abspath(os.path.join("static", "all", "index.html"))
-        with open(index_html_path, "r") as index_html_buffer:
-            index_html_template = Environment(
-                loader=self.file_system_loader
-            ).from_string(index_html_buffer.read())
-
-        # filter apps by category
-        apps_by_category = dict(((x, []) for x in CATEGORIES))
-        for app in self.json:
-            # https://specifications.freedesktop.org/menu-spec/latest/apa.html
-            for category in app["categories"]:
-                if category not in CATEGORIES:
-                    # this category is not a valid desktop file category
-                    # as per freedesktop specifications
-                    print(
-                        Fore.YELLOW + "[STATIC][CATEGORY][W] {} is not a valid desktop "
-                        "category ({})".format(category, app["name"]),
-                        Fore.RESET,
-                    )
-                    continue
+        index_html_template = self.templates.get("all/index.html")
+        sitemap = self.sitemap("categories")
+        sitemap.add(self.page_url(categories_list_directory_path), changefreq="daily")
 
-                apps_by_category[category].append(app)
+        # https://specifications.freedesktop.org/menu-spec/latest/apa.html
+        with report.stage("categories.bucketing"):
+            for category, name in self.store.invalid_categories(CATEGORIES):
+                # this category is not a valid desktop file category
+                # as per freedesktop specifications
+                print(
+                    Fore.YELLOW + "[STATIC][CATEGORY][W] {} is not a valid desktop "
+                    "category ({})".format(category, name),
+                    Fore.RESET,
+                )
 
         for category in CATEGORIES:
             # get the path to the categories
@@ -313,46 +540,44 @@ class LibraryBuilder:
             # create the pages directory
             pages_directory_path = os.path.join(category_directory_path, "p")
             if os.path.exists(pages_directory_path):
-                ask_to_remove(pages_directory_path)
+                ask_to_remove(pages_directory_path, noconfirm=self.args.noconfirm)
             os.makedirs(pages_directory_path)
 
-            self._create_p_directories(
-                json_file=apps_by_category[category],
-                pages_directory_path=pages_directory_path,
-                index_html_template=index_html_template,
-            )
+            sitemap.add(self.page_url(category_directory_path), changefreq="daily")
+            with report.stage("categories.pages"):
+                self._create_p_directories(
+                    positions=self.store.positions(category=category),
+                    pages_directory_path=pages_directory_path,
+                    index_html_template=index_html_template,
+                    sitemap=sitemap,
+                )
 
-            index_html_template_path = os.path.abspath(
-                os.path.join("static", "all", "index.html")
-            )
             index_html_parsed_output_path = os.path.abspath(
                 os.path.join(category_directory_path, "index.html")
             )
 
             read_parse_and_write_template(
-                self.file_system_loader,
-                index_html_template_path,
+                self.templates,
+                "all/index.html",
                 index_html_parsed_output_path,
                 catalog=Catalog(),
                 path_prefix="../..",
                 next_page_link="/categories/{}/p/0".format(category.lower()),
             )
 
-        index_html_template_path = os.path.abspath(
-            os.path.join("static", "categories", "index.html")
-        )
         index_html_parsed_output_path = os.path.abspath(
             os.path.join(categories_list_directory_path, "index.html")
         )
 
         read_parse_and_write_template(
-            self.file_system_loader,
-            index_html_template_path,
+            self.templates,
+            "categories/index.html",
             index_html_parsed_output_path,
             catalog=Catalog(),
             path_prefix="..",
             next_page_link="/p/0",
         )
+        sitemap.close()
 
     def generate_app_list(self):
         """
@@ -362,126 +587,202 @@ class LibraryBuilder:
         :return:
         :rtype:
         """
+        if not self.changed:
+            print("App List is up to date")
+            return
         print("Generating App List")
         all_app_list_directory_path = os.path.join(self.output_directory, "all")
         pages_directory_path = os.path.join(all_app_list_directory_path, "p")
-        if not os.path.exists(pages_directory_path):
-            os.makedirs(pages_directory_path)
+        if os.path.exists(pages_directory_path):
+            # remove the pages of a previous (incremental) build
+            ask_to_remove(pages_directory_path, noconfirm=self.args.noconfirm)
+        os.makedirs(pages_directory_path)
 
-        print("[STATIC] Reading index.html template")
-        index_html_path = os.path.abspath(os.path.join("static", "all", "index.html"))
-        with open(index_html_path, "r") as index_html_buffer:
-            index_html_template = Environment(
-                loader=self.file_system_loader
-            ).from_string(index_html_buffer.read())
+        index_html_template = self.templates.get("all/index.html")
 
-        # sort json
-        sorted_json = copy(self.json)
-        sorted_json.sort(key=lambda x: x["name"].lower())
+        # the index records, sorted by name
+        positions = self.store.positions(order_by_name=True)
 
         # parse
-        self._create_p_directories(
-            json_file=sorted_json,
-            pages_directory_path=pages_directory_path,
-            index_html_template=index_html_template,
-        )
+        sitemap = self.sitemap("all")
+        sitemap.add(self.page_url(all_app_list_directory_path), changefreq="daily")
+        with report.stage("app_list.pages"):
+            self._create_p_directories(
+                positions=positions,
+                pages_directory_path=pages_directory_path,
+                index_html_template=index_html_template,
+                sitemap=sitemap,
+            )
 
-        index_html_template_path = os.path.abspath(
-            os.path.join("static", "all", "index.html")
-        )
         index_html_parsed_output_path = os.path.abspath(
             os.path.join(all_app_list_directory_path, "index.html")
         )
 
         read_parse_and_write_template(
-            self.file_system_loader,
-            index_html_template_path,
+            self.templates,
+            "all/index.html",
             index_html_parsed_output_path,
             catalog=Catalog(),
             path_prefix="..",
             next_page_link="/all/p/0",
         )
+        sitemap.close()
+
+    def compress_output(self):
+        """
+        Writes the gzip / brotli compressed siblings of the generated files,
+        see compress.compress_output
+        :return:
+        :rtype:
+        """
+        from .compress import compress_output
+
+        compress_output(
+            self.output_directory,
+            workers=self.args.compress_workers,
+            min_size=self.args.compress_min_size,
+        )
 
     def _create_p_directories(
-        self, json_file, pages_directory_path, index_html_template
+        self, positions, pages_directory_path, index_html_template, sitemap=None
     ):
         """
         Internal helper function to create ./p/* directories and files in them
-        :param json_file:
-        :type json_file:
+        :param positions: positions of the index records to list, see
+        CatalogStore.positions
+        :type positions: list
         :param pages_directory_path:
         :type pages_directory_path:
         :param index_html_template:
         :type index_html_template:
+        :param sitemap: sitemap to add the pages to
+        :type sitemap: SitemapBuilder
         :return:
         :rtype:
         """
         last_page = True
+        catalog = Catalog()
 
-        # initialize the templates
-        card_template = Environment(loader=self.file_system_loader).from_string(
-            CARD_TEMPLATE
-        )
-
-        for i in range(0, len(json_file), 18)[::-1]:
+        for i in range(0, len(positions), 18)[::-1]:
 
             directory = os.path.join(pages_directory_path, str(i // 18))
-            ask_to_remove(directory, noconfirm=args.noconfirm)
+            ask_to_remove(directory, noconfirm=self.args.noconfirm)
             os.makedirs(directory)
 
             print("[STATIC] Writing {}".format(directory))
             index_html = os.path.abspath(os.path.join(directory, "index.html"))
 
-            column_data = []
-            catalog = Catalog()
-            for j, app in enumerate(json_file[i : i + 18]):
-                column_data.append(
-                    card_template.render(card=Card(app), catalog=catalog)
-                )
+            column_data = [
+                self.cards.get(position) for position in positions[i : i + 18]
+            ]
 
             next_page_link = "/p/{}".format(i // 18 + 1)
             if last_page:
                 last_page = False
                 next_page_link = None
 
-            with open(index_html, "w") as w:
+            with open_output(index_html) as w:
                 w.write(
                     index_html_template.render(
-                        catalog=Catalog(),
+                        catalog=catalog,
                         cards="\n".join(column_data),
                         path_prefix="./../../..",
                         next_page_link=next_page_link,
                     )
                 )
 
+        if sitemap is not None:
+            for i in range(0, len(positions), 18):
+                sitemap.add(
+                    self.page_url(os.path.join(pages_directory_path, str(i // 18))),
+                    changefreq="daily",
+                )
+
 
 def main():
+    # parse arguments
+    args = parse_args()
+
     colorama_init()  # initialize terminal colors for TERM with no colors
 
     if args.version:
         version()
         sys.exit()
 
+    if args.apply_delta:
+        # deploy the last build instead of building
+        apply_delta(args.output_directory, args.apply_delta)
+        sys.exit()
+
+    # all the requests of the build share a pool of keep-alive connections,
+    # whose responses may be recorded, or replayed without any network access
+    from .transport import (
+        PooledTransport,
+        RecordingTransport,
+        ReplayTransport,
+        set_transport,
+    )
+
+    if args.replay:
+        transport = ReplayTransport(args.replay)
+    else:
+        transport = PooledTransport(max_connections=args.http_pool_size)
+        if args.record:
+            transport = RecordingTransport(args.record, transport)
+    set_transport(transport)
+
+    try:
+        build(args)
+    finally:
+        transport.close()
+
+
+def build(args):
     # initialize the library builder
-    lb = LibraryBuilder()
+    lb = LibraryBuilder(args=args)
+
+    # build into a staging directory, which replaces the output directory
+    # once the build is finished
+    lb.stage_output()
 
     # refresh the information from feed.json
-    lb.fetch_feed_json(force_refresh=args.force_refresh_feed)
+    with report.stage("feed"):
+        lb.fetch_feed_json(force_refresh=args.force_refresh_feed)
 
     if args.set_json:
         lb.set_json(args.set_json)
 
     if args.generate_app_pages:
-        lb.generate_app_pages()
+        with report.stage("app_pages"):
+            lb.generate_app_pages()
 
     if args.copy_theme:
-        lb.create_static_directories(lb.output_directory)
+        with report.stage("static"):
+            lb.create_static_directories(lb.output_directory)
 
     if args.generate_app_list:
-        lb.generate_app_list()
+        with report.stage("app_list"):
+            lb.generate_app_list()
 
     if args.generate_categories_pages:
-        lb.generate_categories_pages()
+        with report.stage("categories"):
+            lb.generate_categories_pages()
+
+    # count the files which did not change since the previous build
+    with report.stage("staging"):
+        lb.staging.collect_reused()
+
+    if args.precompress:
+        with report.stage("precompress"):
+            lb.compress_output()
+
+    with report.stage("deploy_manifest"):
+        lb.write_deploy_manifest()
+
+    lb.publish_output()
+    lb.store.close()
+    if args.build_report:
+        report.write(args.build_report, lb.output_directory)
 
 
 if __name__ == "__main__":
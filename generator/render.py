@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import quote
+
+from colorama import Fore
+from progressbar import progressbar
+
+from .appimage import AppImage
+from .catalog import Catalog
+from .jsonapi import write_app_detail
+from .report import report
+from .templates import TemplateRegistry
+from .writers import (
+    canonical_json,
+    get_previous_output,
+    open_output,
+    reuse_previous_output,
+)
+
+
+def get_app_folder(app):
+    """
+    Returns the name of the output folder of a feed.json item, i.e the
+    lower case AppImage.title
+    :param app: feed.json item
+    :type app: dict
+    :return:
+    :rtype: str
+    """
+    return html.escape(app.get("name", "")).lower()
+
+
+class AppRenderer:
+    def __init__(
+        self,
+        input_directory,
+        output_directory,
+        token=None,
+        template_cache=None,
+        templates=None,
+    ):
+        """
+        Renders the app pages (index.html, core.json, shields.json) and
+        the JSON api detail endpoints of the feed.json items
+        :param input_directory: directory in which `static` resides
+        :type input_directory: str
+        :param output_directory: root output directory
+        :type output_directory: str
+        :param token: GitHub OAuth token, see AppImage
+        :type token: str
+        :param template_cache: directory of the template bytecode cache
+        :type template_cache: str
+        :param templates: registry of the templates of the process, a new
+        one is created if None
+        :type templates: TemplateRegistry
+        """
+        if templates is None:
+            templates = TemplateRegistry(
+                input_directory, cache_directory=template_cache
+            )
+        self.appimage_template = templates.get("app/app.html")
+        self.appimage_data_template = templates.get("app/app.md")
+        self.output_directory = output_directory
+        self.token = token
+        self.catalog = Catalog()
+
+    def render(self, app, github_api_data=None, write=True):
+        """
+        Renders the app page of `app` and writes it to its app folder
+        :param app: feed.json item
+        :type app: dict
+        :param github_api_data: prefetched releases of the app
+        :type github_api_data: list
+        :param write: write the app folder, else only return the index data
+        :type write: bool
+        :return: the entry of the app in index.min.json, and the url and
+        lastmod of the app page for the sitemap
+        :rtype: tuple
+        """
+        appimage = AppImage(
+            app, token=self.token, github_api_data=github_api_data
+        ).to_record()
+        sitemap_entry = (
+            "{}/{}/".format(self.catalog.url, quote(appimage.folder)),
+            appimage.last_updated,
+        )
+        json_data = appimage.json_data()
+        if write:
+            self.write(appimage, json_data)
+        return json_data, sitemap_entry
+
+    def write(self, appimage, json_data):
+        """
+        Writes the app folder of `appimage`
+        :param appimage:
+        :type appimage: generator.appimage.record.AppRecord
+        :param json_data: the index record of the app
+        :type json_data: dict
+        :return:
+        :rtype:
+        """
+        path_to_appfolder = os.path.join(self.output_directory, appimage.folder)
+
+        # make the app folder
+        if os.path.exists(path_to_appfolder):
+            print(
+                Fore.YELLOW
+                + "[STATIC][{}] Directory exists.".format(appimage.title)
+                + Fore.RESET
+            )
+        else:
+            os.makedirs(path_to_appfolder)
+
+        # write html file
+        print(
+            Fore.GREEN
+            + "[STATIC][{}] Processing HTML files.".format(appimage.title)
+            + Fore.RESET
+        )
+
+        with open_output(os.path.join(path_to_appfolder, "index.html")) as w:
+            w.write(
+                self.appimage_template.render(
+                    appimage=appimage,
+                    catalog=self.catalog,
+                    content=self.appimage_data_template.render(appimage=appimage),
+                )
+            )
+
+        metadata = appimage.metadata
+        with open_output(os.path.join(path_to_appfolder, "core.json")) as w:
+            w.write(canonical_json(metadata))
+        write_app_detail(self.output_directory, json_data, metadata)
+        shields_badge = appimage.shields_badge()
+        with open_output(os.path.join(path_to_appfolder, "shields.json")) as w:
+            w.write(canonical_json(shields_badge))
+
+
+# the renderer of a worker process, see render_apps
+_renderer = None
+
+
+def _init_worker(renderer_kwargs, previous_output):
+    global _renderer
+    reuse_previous_output(*previous_output)
+    _renderer = AppRenderer(**renderer_kwargs)
+
+
+def _render_timed(renderer, job):
+    wall, cpu = time.perf_counter(), time.process_time()
+    result = renderer.render(*job)
+    return result, time.perf_counter() - wall, time.process_time() - cpu
+
+
+def _render_shard(jobs):
+    return [_render_timed(_renderer, job) for job in jobs]
+
+
+def render_apps(jobs, workers=1, templates=None, **renderer_kwargs):
+    """
+    Renders the app pages of `jobs` and yields the results of
+    AppRenderer.render in the order of `jobs`.
+    With one worker, the jobs are rendered with the `templates` of the
+    calling process. With more than one, the jobs are sharded across a
+    process pool, in which each process compiles the templates once
+    :param jobs: list of (app, github_api_data, write) tuples
+    :type jobs: list
+    :param workers: number of processes
+    :type workers: int
+    :param templates: registry of the templates of the calling process
+    :type templates: TemplateRegistry
+    :param renderer_kwargs: arguments of AppRenderer
+    :type renderer_kwargs:
+    :return:
+    :rtype: generator
+    """
+    if workers <= 1:
+        renderer = AppRenderer(templates=templates, **renderer_kwargs)
+        for job in progressbar(jobs, redirect_stdout=True):
+            result, wall, cpu = _render_timed(renderer, job)
+            report.app(job[0].get("name", ""), wall, cpu)
+            yield result
+        return
+
+    # a few shards per worker, to balance the load of the processes
+    shard_size = max(1, -(-len(jobs) // (workers * 4)))
+    shards = [jobs[i : i + shard_size] for i in range(0, len(jobs), shard_size)]
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(renderer_kwargs, get_previous_output()),
+    ) as executor:
+        for shard, results in zip(
+            shards,
+            progressbar(
+                executor.map(_render_shard, shards),
+                max_value=len(shards),
+                redirect_stdout=True,
+            ),
+        ):
+            for job, (result, wall, cpu) in zip(shard, results):
+                report.app(job[0].get("name", ""), wall, cpu)
+                yield result
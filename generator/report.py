@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from . import __version__
+
+
+def _cpu_time():
+    # the cpu time of this process and of its finished child processes,
+    # e.g the process pools of the renderer
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class BuildReport:
+    def __init__(self):
+        """
+        Collects the timings and counters of a build: wall and cpu time per
+        stage and per app, requests and bytes received per host, hits and
+        misses of the api cache, and the files written to the output
+        directory. Thread safe
+        """
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.stages = dict()
+        self.apps = dict()
+        self.network = dict()
+        self.counters = dict()
+        # (device, inode) of the files of the previous build reused by the
+        # output, see staging.StagingDirectory
+        self._reused = set()
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Records the wall and cpu time of the block as the stage `name`.
+        The times of a stage entered more than once are added up
+        :param name: name of the stage
+        :type name: str
+        :return:
+        :rtype:
+        """
+        wall, cpu = time.perf_counter(), _cpu_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, _cpu_time() - cpu
+            with self._lock:
+                entry = self.stages.setdefault(name, {"wall": 0, "cpu": 0})
+                entry["wall"] = round(entry["wall"] + wall, 6)
+                entry["cpu"] = round(entry["cpu"] + cpu, 6)
+
+    def app(self, name, wall, cpu):
+        """
+        Records the time spent rendering the app `name`
+        :param name:
+        :type name: str
+        :param wall: wall time in seconds
+        :type wall: float
+        :param cpu: cpu time in seconds
+        :type cpu: float
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self.apps[name] = {"wall": round(wall, 6), "cpu": round(cpu, 6)}
+
+    def request(self, url, size=0):
+        """
+        Counts a request to the host of `url`, and the `size` bytes of its
+        response received on the wire
+        :param url:
+        :type url: str
+        :param size: number of bytes of the response body
+        :type size: int
+        :return:
+        :rtype:
+        """
+        host = urlsplit(url).netloc or url
+        with self._lock:
+            entry = self.network.setdefault(host, {"requests": 0, "bytes": 0})
+            entry["requests"] += 1
+            entry["bytes"] += size
+
+    def count(self, name, value=1):
+        """
+        Increments the counter `name`, e.g "api_cache.hit"
+        :param name:
+        :type name: str
+        :param value:
+        :type value: int
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def reuse(self, stat):
+        """
+        Records that a file of the previous build is reused as is by the
+        output directory, which is not counted as written although
+        hardlinking it changed its ctime
+        :param stat: os.stat of the file
+        :type stat: os.stat_result
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            self._reused.add((stat.st_dev, stat.st_ino))
+
+    def files_written(self, output_directory):
+        """
+        Returns the number and total size of the files in `output_directory`
+        which were written (or linked) since the build started, and the
+        number of files reused from the previous build
+        :param output_directory:
+        :type output_directory: str
+        :return:
+        :rtype: dict
+        """
+        written = size = reused = 0
+        for directory, _, file_names in os.walk(output_directory):
+            for file_name in file_names:
+                stat = os.stat(os.path.join(directory, file_name))
+                if (stat.st_dev, stat.st_ino) in self._reused:
+                    reused += 1
+                elif stat.st_ctime >= int(self.started_at):
+                    written += 1
+                    size += stat.st_size
+        return {"written": written, "bytes": size, "reused": reused}
+
+    def data(self, output_directory=None):
+        """
+        Returns the report as json serializable data
+        :param output_directory: root output directory, for the files
+        written
+        :type output_directory: str
+        :return:
+        :rtype: dict
+        """
+        with self._lock:
+            data = {
+                "version": __version__,
+                "started_at": time.strftime(
+                    "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)
+                ),
+                "wall": round(time.perf_counter() - self._start, 6),
+                "cpu": round(_cpu_time(), 6),
+                "stages": dict(self.stages),
+                "apps": dict(self.apps),
+                "network": dict((k, dict(v)) for k, v in self.network.items()),
+                "api_cache": {
+                    "hit": self.counters.get("api_cache.hit", 0),
+                    "revalidated": self.counters.get("api_cache.revalidated", 0),
+                    "miss": self.counters.get("api_cache.miss", 0),
+                },
+                "counters": dict(self.counters),
+            }
+        if output_directory is not None and os.path.isdir(output_directory):
+            data["files"] = self.files_written(output_directory)
+        return data
+
+    def write(self, path, output_directory=None):
+        """
+        Writes the report to `path` as JSON
+        :param path:
+        :type path: str
+        :param output_directory: root output directory
+        :type output_directory: str
+        :return:
+        :rtype:
+        """
+        data = self.data(output_directory)
+        with open(path, "w") as w:
+            json.dump(data, w, indent=2)
+        print(
+            "[STATIC] Build took {:.1f}s, report written to {}".format(
+                data["wall"], path
+            )
+        )
+
+
+# the report of the running build
+report = BuildReport()
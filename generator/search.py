@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import os
+import re
+
+from .writers import write_json
+
+# relative to the output directory
+SEARCH_INDEX_DIRECTORY = os.path.join("search", "index")
+SEARCH_INDEX_VERSION = 1
+
+# fields of an index.min.json record which are searched, and their boost
+SEARCH_FIELDS = ("name", "summary", "maintainer")
+SEARCH_BOOST = (2, 1, 1)
+
+# fields of the result payload (docs.json), one array per app
+DISPLAY_FIELDS = ("name", "summary", "maintainer", "image", "github", "categories")
+
+# weights of prefix and fuzzy matches, and the maximum edit distance of a
+# fuzzy match relative to the length of the query term, see scoreQuery()
+# of static/js/search.js
+PREFIX_WEIGHT = 0.375
+FUZZY_WEIGHT = 0.45
+FUZZY = 0.5
+
+_TAG = re.compile(r"<[^>]*>")
+_SEPARATOR = re.compile(r"[\W_]+")
+_SHARD = re.compile(r"[a-z0-9]")
+
+
+def tokenize(text):
+    """
+    Splits `text` into lower case terms, ignoring html tags.
+    Mirrors tokenize() of static/js/search.js
+    :param text:
+    :type text: str
+    :return:
+    :rtype: list
+    """
+    return [x for x in _SEPARATOR.split(_TAG.sub(" ", text or "").lower()) if x]
+
+
+def get_shard_key(term):
+    """
+    Returns the name of the shard which holds `term`. All the terms
+    starting with a query term are in the shard of the query term.
+    Mirrors shardKey() of static/js/search.js
+    :param term:
+    :type term: str
+    :return:
+    :rtype: str
+    """
+    return term[0] if _SHARD.match(term) else "_"
+
+
+def get_display_data(record):
+    """
+    Returns the result payload of an index.min.json record
+    :param record:
+    :type record: dict
+    :return:
+    :rtype: list
+    """
+    github = ""
+    for link in record.get("links") or ():
+        if link.get("type", "").lower() == "github":
+            github = link.get("url", "")
+            break
+    data = dict(record, github=github)
+    return [data.get(field) for field in DISPLAY_FIELDS]
+
+
+class SearchIndexBuilder:
+    def __init__(self, output_directory):
+        """
+        Builds the inverted index searched by static/js/search.js, so that
+        the browser does not download index.min.json and index it itself.
+
+        search/index/meta.json describes the index, docs.json holds the
+        result payload of every app and terms-<c>.json the terms starting
+        with the character <c>, each followed by a flat list of
+        (document, field, weight) postings. The weight is the term frequency
+        normalized by the length of the field
+        :param output_directory: root output directory
+        :type output_directory: str
+        """
+        self.directory = os.path.join(output_directory, SEARCH_INDEX_DIRECTORY)
+        self.documents = list()
+        self._terms = list()
+
+    def add(self, record):
+        """
+        Adds an index.min.json record to the index
+        :param record:
+        :type record: dict
+        :return:
+        :rtype:
+        """
+        self.documents.append(get_display_data(record))
+        self._terms.append([tokenize(record.get(field)) for field in SEARCH_FIELDS])
+
+    def build(self):
+        """
+        Returns the meta data and the shards of the index
+        :return:
+        :rtype: tuple
+        """
+        count = len(self.documents)
+        average_lengths = [
+            (sum(len(terms[i]) for terms in self._terms) / count) or 1 if count else 1
+            for i in range(len(SEARCH_FIELDS))
+        ]
+        postings = dict()
+        for document, fields in enumerate(self._terms):
+            for field, terms in enumerate(fields):
+                frequencies = dict()
+                for term in terms:
+                    frequencies[term] = frequencies.get(term, 0) + 1
+                length = len(terms) / average_lengths[field]
+                for term, frequency in frequencies.items():
+                    weight = round(frequency / length, 3)
+                    if weight.is_integer():
+                        # 1 instead of 1.0 in the shards
+                        weight = int(weight)
+                    postings.setdefault(term, []).extend((document, field, weight))
+
+        shards = dict()
+        for term in sorted(postings):
+            shards.setdefault(get_shard_key(term), []).append([term, postings[term]])
+        meta = {
+            "version": SEARCH_INDEX_VERSION,
+            "documents": count,
+            "fields": SEARCH_FIELDS,
+            "boost": SEARCH_BOOST,
+            "display": DISPLAY_FIELDS,
+            "shards": sorted(shards),
+        }
+        return meta, shards
+
+    def write(self):
+        """
+        Writes the index to search/index, removing the shards of a
+        previous build which are no longer needed
+        :return:
+        :rtype:
+        """
+        meta, shards = self.build()
+        os.makedirs(self.directory, exist_ok=True)
+        for key, terms in shards.items():
+            write_json(os.path.join(self.directory, "terms-{}.json".format(key)), terms)
+        for file_name in os.listdir(self.directory):
+            if (
+                file_name.startswith("terms-")
+                and file_name[len("terms-") : -len(".json")] not in shards
+            ):
+                os.remove(os.path.join(self.directory, file_name))
+        write_json(os.path.join(self.directory, "docs.json"), self.documents)
+        # written last, the client reads the other files through it
+        write_json(os.path.join(self.directory, "meta.json"), meta)
+        print(
+            "[STATIC] Wrote the search index of {} apps ({} shards)".format(
+                meta["documents"], len(shards)
+            )
+        )
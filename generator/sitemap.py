@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import gzip
+import os
+import re
+import shutil
+from html import escape
+
+from .constants import (
+    SITEMAP_INDEX_HEADER,
+    SITEMAP_INDEX_URL,
+    SITEMAP_LASTMOD,
+    SITEMAP_MAX_BYTES,
+    SITEMAP_MAX_URLS,
+    SITEMAP_URL,
+)
+from .writers import SitemapWriter, open_output
+
+SITEMAP_INDEX = "sitemap.xml"
+
+# sitemap-<section>-<n>.xml
+SITEMAP_SHARD_PATTERN = re.compile(r"^sitemap-([a-z]+)-(\d+)\.xml$")
+
+
+def sitemap_url(url, lastmod=None, changefreq="weekly"):
+    """
+    Formats a <url> entry of a sitemap
+    :param url: absolute url of the page
+    :type url: str
+    :param lastmod: W3C datetime of the last modification, or None
+    :type lastmod: str
+    :param changefreq:
+    :type changefreq: str
+    :return:
+    :rtype: str
+    """
+    return SITEMAP_URL.format(
+        url=escape(url),
+        lastmod=SITEMAP_LASTMOD.format(lastmod) if lastmod else "",
+        changefreq=changefreq,
+    )
+
+
+def write_gzip(path):
+    """
+    Writes a gzip compressed copy of `path` to `path`.gz
+    :param path:
+    :type path: str
+    :return:
+    :rtype:
+    """
+    with open(path, "rb") as r, open_output("{}.gz".format(path)) as w:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=w, mtime=0) as gz:
+            shutil.copyfileobj(r, gz)
+
+
+class SitemapBuilder:
+    def __init__(
+        self,
+        output_directory,
+        base_url,
+        section,
+        max_urls=SITEMAP_MAX_URLS,
+        max_bytes=SITEMAP_MAX_BYTES,
+    ):
+        """
+        Streams the urls of a section of the catalog (apps, all, categories,
+        ...) to sitemap-<section>-<n>.xml, starting a new file whenever one
+        reaches max_urls urls or max_bytes bytes.
+        When closed, every file is compressed to .xml.gz and sitemap.xml is
+        rewritten as the sitemap index of all the sections in
+        output_directory
+        :param output_directory: root output directory
+        :type output_directory: str
+        :param base_url: url of the root output directory
+        :type base_url: str
+        :param section: name of the section, [a-z]+
+        :type section: str
+        :param max_urls: maximum number of urls per file
+        :type max_urls: int
+        :param max_bytes: maximum size of a file
+        :type max_bytes: int
+        """
+        self.output_directory = output_directory
+        self.base_url = base_url
+        self.section = section
+        self.max_urls = max_urls
+        self.max_bytes = max_bytes
+        self.shards = list()
+        self._writer = None
+        self._aborted = False
+
+    def _shard_path(self, n):
+        return os.path.join(
+            self.output_directory, "sitemap-{}-{}.xml".format(self.section, n)
+        )
+
+    def add(self, url, lastmod=None, changefreq="weekly"):
+        """
+        Adds a page to the sitemap
+        :param url: absolute url of the page
+        :type url: str
+        :param lastmod: W3C datetime of the last modification, or None
+        :type lastmod: str
+        :param changefreq:
+        :type changefreq: str
+        :return:
+        :rtype:
+        """
+        fragment = sitemap_url(url, lastmod=lastmod, changefreq=changefreq)
+        if self._writer is not None and (
+            self._writer.count >= self.max_urls
+            or self._writer.size + len(fragment.encode()) + self._writer.footer_size
+            > self.max_bytes
+        ):
+            self._writer.close()
+            self._writer = None
+        if self._writer is None:
+            self.shards.append(self._shard_path(len(self.shards) + 1))
+            self._writer = SitemapWriter(self.shards[-1])
+        self._writer.write(fragment)
+
+    def abort(self):
+        """
+        Discards the file being written. The sitemap index is not updated,
+        so it keeps pointing to the sitemap of the previous build
+        :return:
+        :rtype:
+        """
+        self._aborted = True
+        if self._writer is not None:
+            self._writer.abort()
+            self._writer = None
+
+    def close(self):
+        """
+        Finishes the sitemap of the section, removes files of the section
+        left from a bigger previous build, and rewrites the sitemap index
+        :return:
+        :rtype:
+        """
+        if self._aborted:
+            return
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for path in self.shards:
+            write_gzip(path)
+        for file_name in os.listdir(self.output_directory):
+            match = SITEMAP_SHARD_PATTERN.match(file_name)
+            if (
+                match
+                and match.group(1) == self.section
+                and int(match.group(2)) > len(self.shards)
+            ):
+                os.remove(os.path.join(self.output_directory, file_name))
+                if os.path.exists(
+                    os.path.join(self.output_directory, file_name + ".gz")
+                ):
+                    os.remove(os.path.join(self.output_directory, file_name + ".gz"))
+        write_sitemap_index(self.output_directory, self.base_url)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def write_sitemap_index(output_directory, base_url):
+    """
+    Writes sitemap.xml (and sitemap.xml.gz) as the sitemap index of all the
+    sitemap-<section>-<n>.xml files in output_directory. The lastmod of
+    each file is the latest lastmod of its urls
+    :param output_directory: root output directory
+    :type output_directory: str
+    :param base_url: url of the root output directory
+    :type base_url: str
+    :return:
+    :rtype:
+    """
+    shards = sorted(
+        (match.group(1), int(match.group(2)), match.group(0))
+        for match in map(SITEMAP_SHARD_PATTERN.match, os.listdir(output_directory))
+        if match
+    )
+    index_path = os.path.join(output_directory, SITEMAP_INDEX)
+    with SitemapWriter(index_path, header=SITEMAP_INDEX_HEADER) as index_writer:
+        for _, _, file_name in shards:
+            with open(os.path.join(output_directory, file_name), "r") as r:
+                lastmods = re.findall(r"<lastmod>([^<]+)</lastmod>", r.read())
+            index_writer.write(
+                SITEMAP_INDEX_URL.format(
+                    url=escape("{}/{}".format(base_url, file_name)),
+                    lastmod=SITEMAP_LASTMOD.format(max(lastmods)) if lastmods else "",
+                )
+            )
+    write_gzip(index_path)
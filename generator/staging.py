@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import os
+import shutil
+import sys
+
+from .report import report
+from .writers import link_output, reuse_previous_output
+
+# the compressed siblings of a file, see compress.compress_output
+COMPRESSED_SIBLINGS = (".gz", ".br")
+
+# flags of renameat(2)
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def _exchange(path, other_path):
+    """
+    Atomically exchanges the directories `path` and `other_path` with
+    renameat2(RENAME_EXCHANGE). Returns False where it is not supported,
+    i.e on other platforms than Linux or on some file systems
+    """
+    if not sys.platform.startswith("linux"):
+        return False
+    import ctypes
+
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    return (
+        renameat2(
+            _AT_FDCWD,
+            os.fsencode(path),
+            _AT_FDCWD,
+            os.fsencode(other_path),
+            _RENAME_EXCHANGE,
+        )
+        == 0
+    )
+
+
+class StagingDirectory:
+    def __init__(self, output_directory, siblings=False):
+        """
+        A directory next to `output_directory` which the build writes to,
+        and which replaces `output_directory` once the build is finished,
+        so that a half built catalog is never served or deployed. The files
+        which did not change since the previous build are hardlinks to the
+        files of the previous build rather than written again, see
+        writers.reuse_previous_output
+        :param output_directory: root output directory
+        :type output_directory: str
+        :param siblings: also reuse the up to date compressed siblings of
+        the unchanged files, see compress.compress_output
+        :type siblings: bool
+        """
+        self.output_directory = os.path.normpath(output_directory)
+        self.path = "{}.staging".format(self.output_directory)
+        self.siblings = siblings
+
+    def prepare(self, seed=False):
+        """
+        Creates the staging directory, removing the one of a build which
+        did not finish
+        :param seed: start from a hardlinked copy of the previous build,
+        for the builds which update the previous build in place, e.g
+        --incremental
+        :type seed: bool
+        :return:
+        :rtype:
+        """
+        if os.path.lexists(self.path):
+            print("[STATIC] Removing unfinished build {}".format(self.path))
+            shutil.rmtree(self.path)
+        if os.path.isdir(self.output_directory):
+            reuse_previous_output(self.path, self.output_directory)
+        if not (seed and os.path.isdir(self.output_directory)):
+            os.makedirs(self.path)
+            return
+
+        linked = 0
+        for directory, _, file_names in os.walk(self.output_directory):
+            staging_directory = os.path.join(
+                self.path, os.path.relpath(directory, self.output_directory)
+            )
+            os.makedirs(staging_directory, exist_ok=True)
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                staging_path = os.path.join(staging_directory, file_name)
+                if os.path.islink(path):
+                    os.symlink(os.readlink(path), staging_path)
+                    continue
+                try:
+                    os.link(path, staging_path)
+                except OSError:
+                    shutil.copy2(path, staging_path)
+                    continue
+                linked += 1
+        print(
+            "[STATIC] Building into {} ({} files of the previous "
+            "build linked)".format(self.path, linked)
+        )
+
+    def collect_reused(self):
+        """
+        Counts the files of the staging directory which are hardlinks to
+        the files of the previous build, i.e were not written again, in the
+        report, and links the up to date compressed siblings of the previous
+        build next to them
+        :return: the number of files reused
+        :rtype: int
+        """
+        if not os.path.isdir(self.output_directory):
+            return 0
+        reused = size = 0
+        for directory, _, file_names in os.walk(self.path):
+            previous_directory = os.path.join(
+                self.output_directory, os.path.relpath(directory, self.path)
+            )
+            for file_name in file_names:
+                path = os.path.join(directory, file_name)
+                previous_path = os.path.join(previous_directory, file_name)
+                try:
+                    stat = os.lstat(path)
+                    previous_stat = os.lstat(previous_path)
+                except FileNotFoundError:
+                    # a new file
+                    continue
+                if not os.path.samestat(stat, previous_stat):
+                    continue
+                report.reuse(stat)
+                reused += 1
+                size += stat.st_size
+                if self.siblings:
+                    self._reuse_siblings(path, previous_path, previous_stat)
+
+        print(
+            "[STATIC] {} files unchanged since the previous build, {} bytes "
+            "not written again".format(reused, size)
+        )
+        return reused
+
+    @staticmethod
+    def _reuse_siblings(path, previous_path, previous_stat):
+        # the compressed siblings of the previous build are up to date, and
+        # are not compressed again, if they are not older than the file
+        for extension in COMPRESSED_SIBLINGS:
+            sibling = "{}{}".format(path, extension)
+            previous_sibling = "{}{}".format(previous_path, extension)
+            if os.path.lexists(sibling):
+                continue
+            try:
+                sibling_stat = os.stat(previous_sibling)
+            except FileNotFoundError:
+                continue
+            if sibling_stat.st_mtime >= previous_stat.st_mtime and link_output(
+                previous_sibling, sibling
+            ):
+                report.reuse(sibling_stat)
+
+    def swap(self):
+        """
+        Moves the staging directory in place of the output directory, and
+        removes the previous build
+        :return: the output directory
+        :rtype: str
+        """
+        reuse_previous_output(None, None)
+        if not os.path.lexists(self.output_directory):
+            os.rename(self.path, self.output_directory)
+        elif _exchange(self.path, self.output_directory):
+            # the staging directory now holds the previous build
+            shutil.rmtree(self.path)
+        else:
+            previous_path = "{}.previous".format(self.output_directory)
+            shutil.rmtree(previous_path, ignore_errors=True)
+            os.rename(self.output_directory, previous_path)
+            os.rename(self.path, self.output_directory)
+            shutil.rmtree(previous_path)
+        print("[STATIC] Moved {} to {}".format(self.path, self.output_directory))
+        return self.output_directory
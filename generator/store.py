@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+import os
+import threading
+import time
+
+from .utils import digest
+
+STORE_PATH = "catalog.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    source TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL,
+    status INTEGER
+);
+CREATE TABLE IF NOT EXISTS apps (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    item TEXT NOT NULL,
+    digest TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS apps_name ON apps (name);
+CREATE TABLE IF NOT EXISTS releases (
+    repo TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tag_name TEXT,
+    html_url TEXT,
+    prerelease INTEGER,
+    published_at TEXT,
+    author TEXT,
+    PRIMARY KEY (repo, position)
+);
+CREATE TABLE IF NOT EXISTS assets (
+    repo TEXT NOT NULL,
+    release INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    url TEXT,
+    size INTEGER,
+    PRIMARY KEY (repo, release, position)
+);
+CREATE TABLE IF NOT EXISTS records (
+    position INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    record TEXT NOT NULL,
+    url TEXT,
+    lastmod TEXT
+);
+CREATE INDEX IF NOT EXISTS records_sort_key ON records (sort_key, position);
+CREATE TABLE IF NOT EXISTS record_categories (
+    category TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS record_categories_category
+    ON record_categories (category, position);
+"""
+
+
+class CatalogStore:
+    def __init__(self, path=STORE_PATH):
+        """
+        SQLite store of the state kept between builds: the apps of the
+        feed, the releases (and their AppImage assets) of GitHub hosted
+        apps, the metadata of every fetch and the index records of the
+        last build, which the app list and categories are paginated from.
+        The store is thread safe, and each process opens its own
+        connection; the WAL journal lets other processes read while a
+        build writes
+        :param path: path to the database (defaults to: catalog.sqlite3)
+        :type path: str
+        """
+        self.path = path
+        self._connection = None
+        self._pid = None
+        self._lock = threading.RLock()
+        # depth of the nested transactions, see Transaction
+        self._depth = 0
+
+    def _connect(self):
+        # a connection is not shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            import sqlite3
+
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+            self._pid = os.getpid()
+        return self._connection
+
+    def execute(self, query, parameters=()):
+        """
+        Executes `query` and returns all the rows of its result
+        :param query: SQL statement
+        :type query: str
+        :param parameters:
+        :type parameters: tuple
+        :return:
+        :rtype: list
+        """
+        with self._lock:
+            return self._connect().execute(query, parameters).fetchall()
+
+    def executemany(self, query, parameters):
+        with self._lock:
+            self._connect().executemany(query, parameters)
+
+    def transaction(self):
+        """
+        Returns a context manager which runs the statements executed in it
+        in a single transaction, rolled back if an exception is raised
+        :return:
+        :rtype: Transaction
+        """
+        return Transaction(self)
+
+    # fetch metadata
+
+    def fetch_meta(self, source):
+        """
+        Returns the metadata of the last fetch of `source` (a url or a
+        owner/repo path), or an empty dict if it was never fetched
+        :param source:
+        :type source: str
+        :return:
+        :rtype: dict
+        """
+        rows = self.execute(
+            "SELECT etag, last_modified, fetched_at, status FROM fetches "
+            "WHERE source = ?",
+            (source,),
+        )
+        if not rows:
+            return dict()
+        return dict(zip(("etag", "last_modified", "fetched_at", "status"), rows[0]))
+
+    def fetched(self, source, headers, status=200, fetched_at=None):
+        """
+        Records a fetch of `source`. The validators of a previous fetch
+        are kept if the response is a 304 (Not Modified) without any, and
+        replaced otherwise, so that fresh content fetched without
+        validators (e.g. from the GraphQL api) is never revalidated with
+        the validators of older content
+        :param source: url or owner/repo path
+        :type source: str
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :param status: http status of the response
+        :type status: int
+        :param fetched_at: (defaults to: now)
+        :type fetched_at: float
+        :return:
+        :rtype:
+        """
+        if status == 304:
+            validators = (
+                "etag = coalesce(excluded.etag, etag), "
+                "last_modified = coalesce(excluded.last_modified, last_modified)"
+            )
+        else:
+            validators = "etag = excluded.etag, last_modified = excluded.last_modified"
+        self.execute(
+            "INSERT INTO fetches VALUES (?, ?, ?, ?, ?) ON CONFLICT (source) DO "
+            "UPDATE SET {}, fetched_at = excluded.fetched_at, "
+            "status = excluded.status".format(validators),
+            (
+                source,
+                headers.get("ETag"),
+                headers.get("Last-Modified"),
+                time.time() if fetched_at is None else fetched_at,
+                status,
+            ),
+        )
+
+    # apps of the feed
+
+    def has_apps(self):
+        return bool(self.execute("SELECT 1 FROM apps LIMIT 1"))
+
+    def apps(self):
+        """
+        Returns the apps of the feed, in the order of the feed
+        :return:
+        :rtype: list
+        """
+        return [
+            json.loads(item)
+            for item, in self.execute("SELECT item FROM apps ORDER BY position")
+        ]
+
+    def update_apps(self, apps):
+        """
+        Replaces the apps of the feed with `apps`. An app is identified by
+        its name when counting the added and changed apps
+        :param apps: feed.json items
+        :type apps: list
+        :return: number of added, changed and removed apps
+        :rtype: tuple
+        """
+        previous = dict(self.execute("SELECT name, digest FROM apps"))
+        rows = list()
+        added = changed = 0
+        for position, app in enumerate(apps):
+            name = app.get("name") or ""
+            item_digest = digest(app)
+            previous_digest = previous.get(name)
+            if previous_digest is None:
+                added += 1
+            elif previous_digest != item_digest:
+                changed += 1
+            rows.append((position, name, json.dumps(app), item_digest))
+        removed = len(set(previous) - set(row[1] for row in rows))
+        with self.transaction():
+            self.execute("DELETE FROM apps")
+            self.executemany("INSERT INTO apps VALUES (?, ?, ?, ?)", rows)
+        return added, changed, removed
+
+    # releases of GitHub repositories
+
+    def read_releases(self, repo):
+        """
+        Returns the releases of `repo`, in the shape of prune_releases
+        :param repo: owner/repo path
+        :type repo: str
+        :return:
+        :rtype: list
+        """
+        assets = dict()
+        for release, name, url, size in self.execute(
+            "SELECT release, name, url, size FROM assets WHERE repo = ? "
+            "ORDER BY release, position",
+            (repo,),
+        ):
+            assets.setdefault(release, []).append(
+                {"name": name, "browser_download_url": url, "size": size}
+            )
+        releases = list()
+        for (
+            position,
+            tag_name,
+            html_url,
+            prerelease,
+            published_at,
+            author,
+        ) in self.execute(
+            "SELECT position, tag_name, html_url, prerelease, published_at, "
+            "author FROM releases WHERE repo = ? ORDER BY position",
+            (repo,),
+        ):
+            release = {
+                "tag_name": tag_name,
+                "html_url": html_url,
+                "prerelease": None if prerelease is None else bool(prerelease),
+                "published_at": published_at,
+                "author": None if author is None else {"login": author},
+            }
+            release = dict(
+                (key, value) for key, value in release.items() if value is not None
+            )
+            release["assets"] = assets.get(position, [])
+            releases.append(release)
+        return releases
+
+    def write_releases(self, repo, releases):
+        """
+        Replaces the releases of `repo`
+        :param repo: owner/repo path
+        :type repo: str
+        :param releases: pruned releases, see prune_releases
+        :type releases: list
+        :return:
+        :rtype:
+        """
+        release_rows = list()
+        asset_rows = list()
+        for position, release in enumerate(releases):
+            author = release.get("author")
+            release_rows.append(
+                (
+                    repo,
+                    position,
+                    release.get("tag_name"),
+                    release.get("html_url"),
+                    release.get("prerelease"),
+                    release.get("published_at"),
+                    author.get("login") if author else None,
+                )
+            )
+            for i, asset in enumerate(release["assets"]):
+                asset_rows.append(
+                    (
+                        repo,
+                        position,
+                        i,
+                        asset["name"],
+                        asset["browser_download_url"],
+                        asset["size"],
+                    )
+                )
+        with self.transaction():
+            self.execute("DELETE FROM releases WHERE repo = ?", (repo,))
+            self.execute("DELETE FROM assets WHERE repo = ?", (repo,))
+            self.executemany(
+                "INSERT INTO releases VALUES (?, ?, ?, ?, ?, ?, ?)", release_rows
+            )
+            self.executemany("INSERT INTO assets VALUES (?, ?, ?, ?, ?, ?)", asset_rows)
+
+    # index records of the last build
+
+    def record_writer(self):
+        """
+        Returns a writer which replaces the index records, see RecordWriter
+        :return:
+        :rtype: RecordWriter
+        """
+        return RecordWriter(self)
+
+    def _select_records(self, column, category=None, order_by_name=False):
+        if category is not None:
+            return self.execute(
+                "SELECT {} FROM record_categories JOIN records "
+                "USING (position) WHERE category = ? "
+                "ORDER BY record_categories.position, "
+                "record_categories.rowid".format(column),
+                (category,),
+            )
+        return self._page_records(column, order_by_name)
+
+    def _page_records(self, column, order_by_name, page_size=1000):
+        # reads the records a page at a time, continuing after the sort key
+        # of the last row, so that a large catalog is never held in memory
+        key = ("sort_key", "position") if order_by_name else ("position",)
+        after = None
+        while True:
+            where = ""
+            if after is not None:
+                where = "WHERE ({}) > ({}) ".format(
+                    ", ".join(key), ", ".join("?" * len(key))
+                )
+            rows = self.execute(
+                "SELECT {}, {} FROM records {}ORDER BY {} LIMIT ?".format(
+                    ", ".join(key), column, where, ", ".join(key)
+                ),
+                (after or ()) + (page_size,),
+            )
+            for row in rows:
+                yield row[len(key) :]
+            if len(rows) < page_size:
+                return
+            after = rows[-1][: len(key)]
+
+    def records(self, category=None, order_by_name=False):
+        """
+        Yields the index records of the last build, in the order of the
+        feed, or sorted by (lowercase) name if `order_by_name`
+        :param category: only yield the records of this category
+        :type category: str
+        :param order_by_name:
+        :type order_by_name: bool
+        :return:
+        :rtype: generator
+        """
+        for (record,) in self._select_records("record", category, order_by_name):
+            yield json.loads(record)
+
+    def positions(self, category=None, order_by_name=False):
+        """
+        Returns the positions of the index records yielded by records(),
+        which identify them in the current build
+        :return:
+        :rtype: list
+        """
+        return [
+            position
+            for (position,) in self._select_records(
+                "records.position", category, order_by_name
+            )
+        ]
+
+    def sitemap_entries(self):
+        """
+        Yields the url and lastmod of the app pages of the index records,
+        sorted by (lowercase) name
+        :return:
+        :rtype: generator
+        """
+        for url, lastmod in self._select_records("url, lastmod", order_by_name=True):
+            if url is not None:
+                yield url, lastmod
+
+    def record(self, position):
+        """
+        Returns the index record at `position`
+        :param position:
+        :type position: int
+        :return:
+        :rtype: dict
+        """
+        rows = self.execute(
+            "SELECT record FROM records WHERE position = ?", (position,)
+        )
+        return json.loads(rows[0][0])
+
+    def invalid_categories(self, categories):
+        """
+        Returns the (category, app name) pairs of the records whose
+        category is not one of `categories`
+        :param categories: valid categories
+        :type categories: list
+        :return:
+        :rtype: list
+        """
+        return self.execute(
+            "SELECT category, name FROM record_categories JOIN records "
+            "USING (position) WHERE category NOT IN ({}) "
+            "ORDER BY record_categories.position, record_categories.rowid".format(
+                ", ".join("?" * len(categories))
+            ),
+            tuple(categories),
+        )
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class Transaction:
+    def __init__(self, store):
+        """
+        Runs the statements executed on `store` in a single transaction.
+        The store is locked for the other threads until it ends. A
+        transaction started in another one is part of the outer one
+        :param store:
+        :type store: CatalogStore
+        """
+        self.store = store
+
+    def begin(self):
+        self.store._lock.acquire()
+        if not self.store._depth:
+            self.store._connect().execute("BEGIN")
+        self.store._depth += 1
+
+    def commit(self):
+        self._end("COMMIT")
+
+    def rollback(self):
+        self._end("ROLLBACK")
+
+    def _end(self, statement):
+        try:
+            self.store._depth -= 1
+            if not self.store._depth:
+                self.store._connection.execute(statement)
+        finally:
+            self.store._lock.release()
+
+    def __enter__(self):
+        self.begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+class RecordWriter(Transaction):
+    def __init__(self, store):
+        """
+        Replaces the index records of `store` with the records written to
+        it, in a transaction committed by close() or discarded by abort()
+        :param store:
+        :type store: CatalogStore
+        """
+        super().__init__(store)
+        self.position = 0
+        self.closed = False
+
+    def begin(self):
+        super().begin()
+        self.store.execute("DELETE FROM records")
+        self.store.execute("DELETE FROM record_categories")
+
+    def write(self, record, url=None, lastmod=None):
+        """
+        Writes an index record (AppImage.json_data)
+        :param record:
+        :type record: dict
+        :param url: url of the app page, for the sitemap
+        :type url: str
+        :param lastmod: W3C datetime of the last update of the app
+        :type lastmod: str
+        :return:
+        :rtype:
+        """
+        self.store.execute(
+            "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.position,
+                record["name"],
+                record["name"].lower(),
+                json.dumps(record),
+                url,
+                lastmod,
+            ),
+        )
+        self.store.executemany(
+            "INSERT INTO record_categories VALUES (?, ?)",
+            [(category, self.position) for category in record.get("categories") or []],
+        )
+        self.position += 1
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.commit()
+
+    def abort(self):
+        if not self.closed:
+            self.closed = True
+            self.rollback()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import os
+
+import mistune
+from jinja2 import (
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    FunctionLoader,
+)
+
+from .assets import AssetManifest
+
+
+class TemplateRegistry:
+    def __init__(self, input_directory, cache_directory=None):
+        """
+        Loads the templates of the `static` directory through a single
+        jinja2 Environment, so that each template is compiled at most once
+        per process. Compiled templates are stored in `cache_directory`
+        and reused by later builds.
+        Templates are named by their path relative to static/templates or
+        static, e.g "card.html", "all/index.html". Markdown templates
+        ("app/app.md") are converted to HTML before they are compiled.
+        The templates link to the files of `static` with asset(path), see
+        AssetManifest.url
+        :param input_directory: directory in which `static` resides
+        :type input_directory: str
+        :param cache_directory: directory of the bytecode cache, or None
+        :type cache_directory: str
+        """
+        self.static_directory = os.path.join(input_directory, "static")
+        self.templates_directory = os.path.join(self.static_directory, "templates")
+        bytecode_cache = None
+        if cache_directory:
+            os.makedirs(cache_directory, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_directory)
+        self.environment = Environment(
+            loader=ChoiceLoader(
+                (
+                    FunctionLoader(self._load_markdown),
+                    FileSystemLoader((self.templates_directory, self.static_directory)),
+                )
+            ),
+            bytecode_cache=bytecode_cache,
+        )
+        self.assets = AssetManifest(self.static_directory)
+        self.environment.globals["asset"] = self.assets.url
+
+    def _load_markdown(self, name):
+        if not name.endswith(".md"):
+            return None
+        path = os.path.join(self.static_directory, name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as r:
+            source = mistune.html(r.read())
+        mtime = os.path.getmtime(path)
+        return source, path, lambda: os.path.getmtime(path) == mtime
+
+    def get(self, name):
+        """
+        Returns the compiled template `name`
+        :param name: name of the template
+        :type name: str
+        :return:
+        :rtype: jinja2.Template
+        """
+        return self.environment.get_template(name)
+
+    def source(self, name):
+        """
+        Returns the source of the template `name`
+        :param name: name of the template
+        :type name: str
+        :return:
+        :rtype: str
+        """
+        return self.environment.loader.get_source(self.environment, name)[0]
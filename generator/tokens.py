@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import threading
+import time
+
+from colorama import Fore
+
+# the number of requests an authenticated user can make per hour
+# used as the estimate of the budget of a token before GitHub reports it
+DEFAULT_RATELIMIT = 5000
+
+
+class RateLimitExceeded(Exception):
+    pass
+
+
+class TokenPool:
+    def __init__(self, tokens, max_wait=3600):
+        """
+        Hands out GitHub tokens based on their remaining ratelimit budget.
+        The budget is read from the X-RateLimit-Remaining and
+        X-RateLimit-Reset headers of the responses
+        :param tokens: list of GitHub OAuth tokens
+        :type tokens: list
+        :param max_wait: maximum number of seconds to sleep until a token is
+        reset when all the tokens are exhausted
+        :type max_wait: int
+        """
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._state = dict()
+        for token in tokens:
+            if token in self._state:
+                continue
+            self._state[token] = {
+                "remaining": DEFAULT_RATELIMIT,
+                "reset": None,
+                "requests": 0,
+                "ratelimited": 0,
+            }
+
+    def __bool__(self):
+        return bool(self._state)
+
+    def __len__(self):
+        return len(self._state)
+
+    def acquire(self):
+        """
+        Returns the token with the most remaining budget. If all the tokens
+        are exhausted, sleeps until the first of them is reset
+        :raises RateLimitExceeded: if no token is reset within max_wait
+        :return:
+        :rtype: str
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                for state in self._state.values():
+                    if state["reset"] is not None and state["reset"] <= now:
+                        # the ratelimit window of the token is over
+                        state["remaining"] = max(state["remaining"], 1)
+                        state["reset"] = None
+                token, state = max(self._state.items(), key=lambda x: x[1]["remaining"])
+                if state["remaining"] > 0:
+                    # reserve one request, so that concurrent requests are
+                    # spread over the tokens
+                    state["remaining"] -= 1
+                    return token
+                resets = [s["reset"] for s in self._state.values() if s["reset"]]
+                # without a known reset, the budget was reserved by requests
+                # in flight which will update it shortly
+                wait = min(resets) - now if resets else 1
+
+            if wait > self.max_wait:
+                raise RateLimitExceeded(
+                    "All the tokens are ratelimited for another "
+                    "{:.0f} seconds".format(wait)
+                )
+            print(
+                Fore.YELLOW + "[UPSTREAM] All tokens are ratelimited, sleeping {:.0f} "
+                "seconds until reset".format(wait) + Fore.RESET
+            )
+            time.sleep(max(wait, 1))
+
+    def update(self, token, headers):
+        """
+        Updates the budget of `token` from the headers of a response
+        :param token: GitHub OAuth token used for the request
+        :type token: str
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            state = self._state[token]
+            state["requests"] += 1
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset")
+            if remaining is not None and remaining.isdigit():
+                state["remaining"] = int(remaining)
+            if reset is not None and reset.isdigit():
+                state["reset"] = int(reset)
+
+    def is_ratelimited(self, headers):
+        """
+        Checks if a 403 / 429 response was caused by the ratelimit
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :return:
+        :rtype: bool
+        """
+        return (
+            headers.get("X-RateLimit-Remaining") == "0"
+            or headers.get("Retry-After") is not None
+        )
+
+    def exhausted(self, token, headers):
+        """
+        Marks `token` as exhausted until its ratelimit is reset. The
+        response should have been recorded with update() first
+        :param token: GitHub OAuth token used for the request
+        :type token: str
+        :param headers: response headers
+        :type headers: http.client.HTTPMessage
+        :return:
+        :rtype:
+        """
+        with self._lock:
+            state = self._state[token]
+            state["ratelimited"] += 1
+            state["remaining"] = 0
+            retry_after = headers.get("Retry-After")
+            if retry_after is not None and retry_after.isdigit():
+                state["reset"] = time.time() + int(retry_after)
+            elif state["reset"] is None:
+                state["reset"] = time.time() + 60
+
+    def report(self):
+        """
+        Prints the number of requests made with each token
+        :return:
+        :rtype:
+        """
+        for token, state in self._state.items():
+            if state["reset"]:
+                reset = time.strftime("%H:%M:%S", time.localtime(state["reset"]))
+            else:
+                reset = "-"
+            print(
+                "[UPSTREAM] Token ...{}: {} requests, {} ratelimited, "
+                "{} remaining, resets at {}".format(
+                    token[-4:],
+                    state["requests"],
+                    state["ratelimited"],
+                    state["remaining"],
+                    reset,
+                )
+            )
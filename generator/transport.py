@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import base64
+import gzip
+import hashlib
+import http.client
+import io
+import json
+import os
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+import zlib
+
+from colorama import Fore
+
+from . import __version__
+from .report import report
+
+# request headers which change the response, and are part of the key of a
+# recorded response. Authorization is never recorded
+KEY_HEADERS = ("If-None-Match", "If-Modified-Since")
+
+USER_AGENT = "get-appimage/{}".format(__version__)
+
+MAX_REDIRECTS = 5
+
+
+class NotRecorded(urllib.error.URLError):
+    pass
+
+
+class BufferedResponse:
+    def __init__(self, url, status, headers, body, size=None):
+        """
+        A response read completely into memory, with the parts of the
+        interface of http.client.HTTPResponse used by the generator
+        :param url:
+        :type url: str
+        :param status: http status
+        :type status: int
+        :param headers: list of (header, value) pairs
+        :type headers: list
+        :param body: decoded response body
+        :type body: bytes
+        :param size: number of bytes received (defaults to: len(body))
+        :type size: int
+        """
+        self.url = url
+        self.status = self.code = status
+        self.headers = http.client.HTTPMessage()
+        for header, value in headers:
+            self.headers[header] = value
+        self.body = body
+        self.size = len(body) if size is None else size
+        self._body = io.BytesIO(body)
+
+    def read(self, *args):
+        return self._body.read(*args)
+
+    def geturl(self):
+        return self.url
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def to_error(self):
+        """
+        Returns the response as the urllib.error.HTTPError urlopen raises
+        for a non 2xx status
+        """
+        return urllib.error.HTTPError(
+            self.url, self.status, "", self.headers, io.BytesIO(self.body)
+        )
+
+
+def get_request_key(request, conditional=True):
+    """
+    Returns the key of `request` in a FixtureStore: its method, url, a hash
+    of its body and, if `conditional`, its validators
+    :param request:
+    :type request: urllib.request.Request
+    :param conditional:
+    :type conditional: bool
+    :return:
+    :rtype: str
+    """
+    key = [request.get_method(), request.full_url]
+    if request.data:
+        key.append(hashlib.sha256(request.data).hexdigest())
+    if conditional:
+        for header in KEY_HEADERS:
+            value = request.get_header(header.capitalize())
+            if value:
+                key.append("{}: {}".format(header, value))
+    return " ".join(key)
+
+
+class FixtureStore:
+    def __init__(self, path):
+        """
+        Recorded http responses, stored as gzip compressed JSON lines
+        :param path: path to the store, e.g fixtures.jsonl.gz
+        :type path: str
+        """
+        self.path = path
+        self.responses = dict()
+        self._lock = threading.Lock()
+
+    def load(self):
+        with gzip.open(self.path, "rt") as r:
+            for line in r:
+                entry = json.loads(line)
+                self.responses[entry["key"]] = entry
+        return self
+
+    def get(self, key):
+        entry = self.responses.get(key)
+        if entry is None:
+            return None
+        if "body_base64" in entry:
+            body = base64.b64decode(entry["body_base64"])
+        else:
+            body = entry["body"].encode()
+        return BufferedResponse(
+            entry["url"], entry["status"], entry["headers"], body, entry.get("size")
+        )
+
+    def add(self, key, response):
+        entry = {
+            "key": key,
+            "url": response.url,
+            "status": response.status,
+            "headers": response.headers.items(),
+            "size": response.size,
+        }
+        try:
+            entry["body"] = response.body.decode()
+        except UnicodeDecodeError:
+            entry["body_base64"] = base64.b64encode(response.body).decode()
+        with self._lock:
+            self.responses[key] = entry
+
+    def save(self):
+        with self._lock:
+            entries = [self.responses[key] for key in sorted(self.responses)]
+        with gzip.open("{}.part".format(self.path), "wt") as w:
+            for entry in entries:
+                w.write(json.dumps(entry))
+                w.write("\n")
+        os.replace("{}.part".format(self.path), self.path)
+        print("[UPSTREAM] Recorded {} responses to {}".format(len(entries), self.path))
+
+
+class Transport:
+    """
+    Sends the http requests of the generator with urllib, opening a new
+    connection per request
+    """
+
+    def urlopen(self, request):
+        """
+        Sends `request` like urllib.request.urlopen: returns the response,
+        or raises urllib.error.HTTPError for a non 2xx status. The request
+        and the bytes received are counted in the build report
+        :param request: url or request
+        :type request: urllib.request.Request
+        :return:
+        :rtype: BufferedResponse
+        """
+        if isinstance(request, str):
+            request = urllib.request.Request(request)
+        response = self.send(request)
+        report.request(request.full_url, response.size)
+        if not 200 <= response.status < 300:
+            raise response.to_error()
+        return response
+
+    def send(self, request):
+        """
+        Sends `request` and returns the response, whatever its status
+        :param request:
+        :type request: urllib.request.Request
+        :return:
+        :rtype: BufferedResponse
+        """
+        try:
+            with urllib.request.urlopen(request) as response:
+                return BufferedResponse(
+                    response.url,
+                    response.status,
+                    response.headers.items(),
+                    response.read(),
+                )
+        except urllib.error.HTTPError as err:
+            return BufferedResponse(err.url, err.code, err.headers.items(), err.read())
+
+    def close(self):
+        pass
+
+
+class PooledTransport(Transport):
+    def __init__(self, max_connections=8, timeout=60):
+        """
+        Sends the requests over persistent (keep-alive) connections, so
+        that the requests to a host share a few TCP / TLS handshakes.
+        Responses are requested gzip compressed and decoded transparently.
+        Redirects are followed like urllib does. Thread safe; requests
+        which need a proxy fall back to urllib
+        :param max_connections: maximum number of idle connections kept
+        per host
+        :type max_connections: int
+        :param timeout: socket timeout in seconds
+        :type timeout: int
+        """
+        self.max_connections = max(1, max_connections)
+        self.timeout = timeout
+        self._idle = dict()
+        self._lock = threading.Lock()
+        self._proxies = urllib.request.getproxies()
+
+    def _get_connection(self, scheme, host):
+        with self._lock:
+            idle = self._idle.get((scheme, host))
+            if idle:
+                return idle.pop(), True
+        report.count("http.connections")
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, timeout=self.timeout), False
+        return http.client.HTTPConnection(host, timeout=self.timeout), False
+
+    def _put_connection(self, scheme, host, connection):
+        with self._lock:
+            idle = self._idle.setdefault((scheme, host), [])
+            if len(idle) < self.max_connections:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def _request(self, method, url, headers, data):
+        """
+        Sends a single request on a pooled connection, and returns the
+        status, headers and raw body of the response
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = "{}?{}".format(path, parts.query)
+        connection, reused = self._get_connection(parts.scheme, parts.netloc)
+        try:
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (http.client.HTTPException, ConnectionError):
+            connection.close()
+            if not reused:
+                raise
+            # the server closed the idle connection, retry on a new one
+            return self._request(method, url, headers, data)
+        if response.will_close:
+            connection.close()
+        else:
+            self._put_connection(parts.scheme, parts.netloc, connection)
+        return response.status, response.getheaders(), body
+
+    def send(self, request):
+        scheme = urllib.parse.urlsplit(request.full_url).scheme
+        if scheme in self._proxies or scheme not in ("http", "https"):
+            return super().send(request)
+
+        method, url, data = request.get_method(), request.full_url, request.data
+        headers = dict(request.header_items())
+        headers.setdefault("User-agent", USER_AGENT)
+        headers["Accept-encoding"] = "gzip"
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = self._request(method, url, headers, data)
+            location = dict((k.lower(), v) for k, v in response_headers).get("location")
+            if status not in (301, 302, 303, 307, 308) or not location:
+                break
+            url = urllib.parse.urljoin(url, location)
+            if status in (301, 302, 303) and method != "HEAD":
+                method, data = "GET", None
+                headers.pop("Content-type", None)
+                headers.pop("Content-length", None)
+
+        size = len(body)
+        encoding = dict((k.lower(), v) for k, v in response_headers).get(
+            "content-encoding", ""
+        )
+        if encoding.lower() == "gzip":
+            body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+            response_headers = [
+                (k, v)
+                for k, v in response_headers
+                if k.lower() not in ("content-encoding", "content-length")
+            ]
+        return BufferedResponse(url, status, response_headers, body, size)
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle.clear()
+
+
+class RecordingTransport(Transport):
+    def __init__(self, path, transport=None):
+        """
+        Sends the requests with `transport` and records the responses
+        (status, headers and body) to the FixtureStore at `path` when closed.
+        The requests are sent without their validators, so that the fixture
+        holds full responses whatever the state of the store was while
+        recording
+        :param path:
+        :type path: str
+        :param transport: (defaults to: PooledTransport())
+        :type transport: Transport
+        """
+        self.store = FixtureStore(path)
+        self.transport = transport if transport is not None else PooledTransport()
+
+    def send(self, request):
+        validators = [header.capitalize() for header in KEY_HEADERS]
+        request = urllib.request.Request(
+            request.full_url,
+            data=request.data,
+            headers=dict(
+                (key, value)
+                for key, value in request.header_items()
+                if key not in validators
+            ),
+            method=request.get_method(),
+        )
+        response = self.transport.send(request)
+        self.store.add(get_request_key(request), response)
+        return response
+
+    def close(self):
+        self.transport.close()
+        self.store.save()
+
+
+class ReplayTransport(Transport):
+    def __init__(self, path):
+        """
+        Serves the responses recorded by a RecordingTransport, without any
+        network access. A conditional request which was not recorded is
+        answered with the recorded response of the unconditional request
+        :param path:
+        :type path: str
+        """
+        self.store = FixtureStore(path).load()
+        print(
+            "[UPSTREAM] Replaying {} recorded responses from {}".format(
+                len(self.store.responses), path
+            )
+        )
+
+    def send(self, request):
+        response = self.store.get(get_request_key(request))
+        if response is None:
+            response = self.store.get(get_request_key(request, conditional=False))
+        if response is None:
+            print(
+                Fore.RED
+                + "[UPSTREAM] No recorded response for {} {}".format(
+                    request.get_method(), request.full_url
+                )
+                + Fore.RESET
+            )
+            raise NotRecorded("{} was not recorded".format(request.full_url))
+        return response
+
+
+# the transport of the running build, see set_transport
+_transport = PooledTransport()
+
+
+def get_transport():
+    return _transport
+
+
+def set_transport(transport):
+    """
+    Sets the transport used by all the requests of the generator
+    :param transport:
+    :type transport: Transport
+    :return:
+    :rtype:
+    """
+    global _transport
+    _transport = transport
@@ -26,27 +26,37 @@ SOFTWARE.
 This file is part of AppImage Catalog Generator
 """
 
+import hashlib
+import json
 import os
 import shutil
 import sys
-from getpass import getpass
-import random
 
-from jinja2 import Environment
-from progressbar import progressbar
+from .writers import open_output
 
 
-def read_parse_and_write_template(
-    file_system_loader, html_template_path, html_output_path, **kwargs
-):
+def digest(data):
     """
-    Read HTML Template, parse the HTML template with jinja template
-    renderer and write the formatted jinja template to html_output_path with
-    kwargs as the argument
-    :param file_system_loader: jinja2 FileSystemLoader
-    :type file_system_loader: jinja2.FileSystemLoader
-    :param html_template_path: Path to the HTML template
-    :type html_template_path: str
+    Returns a sha256 hash of json serializable `data`
+    :param data:
+    :type data:
+    :return:
+    :rtype: str
+    """
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+def read_parse_and_write_template(templates, template_name, html_output_path, **kwargs):
+    """
+    Get the compiled jinja template `template_name` from the template
+    registry, render it with kwargs as the argument and write it to
+    html_output_path
+    :param templates: template registry
+    :type templates: generator.templates.TemplateRegistry
+    :param template_name: name of the template, e.g. all/index.html
+    :type template_name: str
     :param html_output_path: Path to write the parsed HTML template
     :type html_output_path: str
     :param kwargs:
@@ -56,14 +66,11 @@ def read_parse_and_write_template(
     """
     output_path_file_name = html_output_path.split(os.path.sep)[-1]
 
-    print("[STATIC] Reading template: {}".format(output_path_file_name))
-    with open(html_template_path, "r") as _buffer:
-        html_template = Environment(loader=file_system_loader).from_string(
-            _buffer.read()
-        )
+    print("[STATIC] Reading template: {}".format(template_name))
+    html_template = templates.get(template_name)
 
     print("[STATIC] Writing parsed template: {}".format(output_path_file_name))
-    with open(html_output_path, "w") as w:
+    with open_output(html_output_path) as w:
         w.write(html_template.render(**kwargs))
 
 
@@ -79,44 +86,27 @@ def ask_to_remove(directory, noconfirm=False):
     """
     if os.path.exists(directory):
         if not noconfirm:
-            # ask user for confirmation before removing directory
-            proceed = input(
-                "The operation will remove {}. "
-                "Are you sure you want to proceed? "
-                "(Y/n) ".format(directory)
-            )
-            if proceed not in ("y", "Y"):
-                print("Terminated on user request.")
-                sys.exit(-1)
+            confirm_removal(directory)
         shutil.rmtree(directory, ignore_errors=True)
 
 
-def copytree(src, dst, symlinks=False, ignore=None):
+def confirm_removal(directory):
     """
-    Recursively copies directories and files and follow
-    symlinks if necessary
-    :param src: Path like object (source)
-    :type src: str
-    :param dst: Path like object (destination)
-    :type dst: str
-    :param symlinks: Should symlinks be copied?
-    :type symlinks: bool
-    :param ignore: Ignore all errors?
-    :type ignore: bool
-    :return: None
-    :rtype: None
+    Asks the user for confirmation before removing a directory, and exits
+    if they do not confirm
+    :param directory: path to directory
+    :type directory:
+    :return:
+    :rtype:
     """
-    for item in os.listdir(src):
-        s = os.path.join(src, item)
-        d = os.path.join(dst, item)
-        if os.path.isdir(s):
-            try:
-                shutil.copytree(s, d, symlinks, ignore)
-            except FileExistsError:
-                shutil.rmtree(d)
-                shutil.copytree(s, d, symlinks, ignore)
-        else:
-            shutil.copy2(s, d)
+    proceed = input(
+        "The operation will remove {}. "
+        "Are you sure you want to proceed? "
+        "(Y/n) ".format(directory)
+    )
+    if proceed not in ("y", "Y"):
+        print("Terminated on user request.")
+        sys.exit(-1)
 
 
 def check_progressbar(*arg, **kwarg):
@@ -131,20 +121,22 @@ def check_progressbar(*arg, **kwarg):
     :rtype:
     """
     if kwarg.pop("enable_progressbar"):
+        from progressbar import progressbar
+
         return progressbar(*arg, **kwarg)
     else:
         return list(*arg)
 
 
-def get_github_token(args):
+def get_github_tokens(args):
     """
-    Gets the github token
+    Gets the list of github tokens
     :return:
     :rtype:
     """
     if args.gh_token:
-        return random.choice(args.gh_token)
+        return args.gh_token
     elif os.getenv("GH_TOKEN"):
-        return os.getenv("GH_TOKEN")
+        return [os.getenv("GH_TOKEN")]
     else:
-        return None
+        return []
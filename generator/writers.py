@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+MIT License
+
+Copyright (c) 2020 Srevin Saju
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+-----------------------------
+This file is part of AppImage Catalog Generator
+"""
+
+import json
+import os
+
+from .constants import SITEMAP_HEADER
+
+
+def canonical_json(data):
+    """
+    Serializes `data` to compact JSON with sorted keys, so that equal data
+    is always written as the same bytes, whatever the order it was built
+    in. Keys which are not strings, e.g the release numbers of core.json,
+    are converted like json.dumps would
+    :param data: json serializable data
+    :type data:
+    :return:
+    :rtype: str
+    """
+    return json.dumps(_string_keys(data), sort_keys=True, separators=(",", ":"))
+
+
+def _string_keys(data):
+    if isinstance(data, dict):
+        return dict(
+            (
+                key if isinstance(key, str) else json.dumps(key),
+                _string_keys(value),
+            )
+            for key, value in data.items()
+        )
+    if isinstance(data, (list, tuple)):
+        return [_string_keys(value) for value in data]
+    return data
+
+
+# the output directory being built and the output directory of the
+# previous build, see reuse_previous_output
+_previous_output = None
+
+
+def reuse_previous_output(directory, previous_directory):
+    """
+    Makes the writers of this module hardlink the files of `directory`
+    whose content is the same as the file at the same path in
+    `previous_directory` instead of writing them, see
+    staging.StagingDirectory. None stops reusing the previous build
+    :param directory: output directory being built
+    :type directory: str
+    :param previous_directory: output directory of the previous build
+    :type previous_directory: str
+    :return:
+    :rtype:
+    """
+    global _previous_output
+    if directory is None or previous_directory is None:
+        _previous_output = None
+    else:
+        _previous_output = (
+            os.path.abspath(directory),
+            os.path.abspath(previous_directory),
+        )
+
+
+def get_previous_output():
+    """
+    Returns the arguments of the last reuse_previous_output, e.g to pass
+    them to worker processes
+    :return:
+    :rtype: tuple
+    """
+    return _previous_output or (None, None)
+
+
+def previous_path(path):
+    """
+    Returns the path of the file of the previous build at the same path as
+    the output file `path`, or None if the previous build is not reused
+    :param path:
+    :type path: str
+    :return:
+    :rtype: str
+    """
+    if _previous_output is None:
+        return None
+    directory, previous_directory = _previous_output
+    path = os.path.abspath(path)
+    if not path.startswith(directory + os.path.sep):
+        return None
+    return os.path.join(previous_directory, os.path.relpath(path, directory))
+
+
+def link_output(source, path):
+    """
+    Replaces the output file `path` with a hardlink to `source`
+    :param source:
+    :type source: str
+    :param path:
+    :type path: str
+    :return: False if hardlinks are not supported
+    :rtype: bool
+    """
+    try:
+        if os.path.samefile(source, path):
+            # renaming a hardlink over another link of the same file does
+            # nothing, see rename(2)
+            return True
+    except FileNotFoundError:
+        pass
+    temporary_path = "{}.link".format(path)
+    try:
+        os.link(source, temporary_path)
+    except OSError:
+        return False
+    os.replace(temporary_path, path)
+    return True
+
+
+def open_output(path):
+    """
+    Opens a file of the output directory for writing (str or bytes), see
+    OutputFile
+    :param path:
+    :type path: str
+    :return:
+    :rtype: OutputFile
+    """
+    return OutputFile(path)
+
+
+def remove_output(path):
+    """
+    Removes the file `path` of the output directory, if it exists
+    :param path:
+    :type path: str
+    :return:
+    :rtype:
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class AtomicWriter:
+    def __init__(self, path):
+        """
+        Writes to a temporary file next to `path`, which replaces `path`
+        when the writer is closed. A build which crashes midway leaves the
+        previous file in place instead of a truncated one.
+
+        While the data written is the same as the file of the previous
+        build (see reuse_previous_output), it is only compared with it and
+        nothing is written; a file which is the same up to the end becomes
+        a hardlink to the file of the previous build
+        :param path: path to the file
+        :type path: str
+        """
+        self.path = path
+        self.temporary_path = "{}.part".format(path)
+        self.count = 0
+        self.size = 0
+        self.closed = False
+        self._buffer = None
+        self._previous = None
+        previous = previous_path(path)
+        if previous is not None and os.path.isfile(previous):
+            self._previous = open(previous, "rb")
+        else:
+            self._buffer = open(self.temporary_path, "wb")
+
+    def _write(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.size += len(data)
+        if self._previous is not None:
+            if self._previous.read(len(data)) == data:
+                return
+            self._diverge(self.size - len(data))
+        self._buffer.write(data)
+
+    def _diverge(self, matched, chunk_size=64 * 1024):
+        # writes the `matched` bytes which were the same as the previous
+        # file, and stops comparing
+        self._buffer = open(self.temporary_path, "wb")
+        self._previous.seek(0)
+        while matched:
+            chunk = self._previous.read(min(matched, chunk_size))
+            self._buffer.write(chunk)
+            matched -= len(chunk)
+        self._previous.close()
+        self._previous = None
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        """
+        Finishes the file and moves it in place of `path`
+        :return:
+        :rtype:
+        """
+        if self.closed:
+            return
+        self._finish()
+        self.closed = True
+        if self._previous is not None:
+            if not self._previous.read(1):
+                # the same content as the file of the previous build
+                self._previous.close()
+                if link_output(self._previous.name, self.path):
+                    return
+                self._previous = open(self._previous.name, "rb")
+            self._diverge(self.size)
+        self._buffer.close()
+        os.replace(self.temporary_path, self.path)
+
+    def abort(self):
+        """
+        Discards everything written, leaving `path` untouched
+        :return:
+        :rtype:
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self._previous is not None:
+            self._previous.close()
+        if self._buffer is not None:
+            self._buffer.close()
+            os.remove(self.temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class OutputFile(AtomicWriter):
+    """
+    A file of the output directory, with the write method of a file
+    """
+
+    def write(self, data):
+        self._write(data)
+
+    def flush(self):
+        pass
+
+
+class JsonArrayWriter(AtomicWriter):
+    """
+    Streams records to a compact JSON array, each record serialized by
+    canonical_json
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._write("[")
+
+    def write(self, record):
+        if self.count:
+            self._write(",")
+        self._write(canonical_json(record))
+        self.count += 1
+
+    def _finish(self):
+        self._write("]")
+
+
+class SitemapWriter(AtomicWriter):
+    """
+    Streams <url> fragments (constants.SITEMAP_URL) to a sitemap, or
+    <sitemap> fragments to a sitemap index with header=SITEMAP_INDEX_HEADER
+    """
+
+    def __init__(self, path, header=SITEMAP_HEADER):
+        super().__init__(path)
+        self._header, self._footer = header.split("{content}")
+        self._write(self._header)
+
+    @property
+    def footer_size(self):
+        return len(self._footer.encode())
+
+    def write(self, fragment):
+        self._write(fragment)
+        self.count += 1
+
+    def _finish(self):
+        self._write(self._footer)
+
+
+def write_json(path, data):
+    """
+    Atomically writes `data` to `path` as canonical JSON, see
+    canonical_json
+    :param path:
+    :type path: str
+    :param data: json serializable data
+    :type data:
+    :return:
+    :rtype:
+    """
+    with open_output(path) as writer:
+        writer.write(canonical_json(data))
@@ -22,7 +22,17 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 */
 
-var miniSearch;
+// pre-built search index, see generator/search.py
+const SEARCH_INDEX_URL = '../search/index/';
+const PREFIX_WEIGHT = 0.375;
+const FUZZY_WEIGHT = 0.45;
+const FUZZY = 0.5;
+
+var searchIndexMeta;
+var searchShards = {};
+var searchDocuments;
+// pending or finished requests of the index files, by file name
+var searchRequests = {};
 
 
 function compareAlphabetically(el1, el2, index) {
@@ -48,19 +58,27 @@ function titleCase(str) {
   return str.join(' ');
 }
 
+function categoriesHtml(categories) {
+  // same markup as AppImage.categories_html
+  let tags = '';
+  $.each(categories || [], function(i, category) {
+    tags += `<div class="control"><div class="tags has-addons"><a class="tag is-link" href="../search?q=${category}">${category}</a><span class="tag is-dark">#</span></div></div>`;
+  });
+  return `<div class="field is-grouped is-grouped-multiline  appimage-left-top-margin">${tags}</div>`;
+}
+
 function addAppimageCard(i, item) {
     const image_src = item['image'];
     const appimage_name = item['name'];
     const appimage_maintainer = item['maintainer'];
     const appimage_summary = item['summary'];
-    const appimage_categories = item['categories_html'];
+    const appimage_categories = categoriesHtml(item['categories']);
     let appimage_github;
     let isGitHub;
-    try {
-        appimage_github = `https://github.com/${item['github'][0]["url"]}`;
+    if (item['github']) {
+        appimage_github = `https://github.com/${item['github']}`;
         isGitHub = 'github';
-    } catch (err) {
-        console.log(item['github']);
+    } else {
         appimage_github = "";
         isGitHub = '';
     }
@@ -104,39 +122,150 @@ function addAppimageCard(i, item) {
 }
 
 
+function tokenize(text) {
+  // mirrors generator.search.tokenize
+  return (text || '').replace(/<[^>]*>/g, ' ').toLowerCase()
+    .split(/[^\p{L}\p{N}]+/u).filter(function(term) { return term; });
+}
+
+function shardKey(term) {
+  // mirrors generator.search.get_shard_key
+  return /^[a-z0-9]/.test(term) ? term.charAt(0) : '_';
+}
+
+function editDistance(a, b, maxDistance) {
+  // levenshtein distance of a and b, or maxDistance + 1 if it is larger
+  if (Math.abs(a.length - b.length) > maxDistance) {
+    return maxDistance + 1;
+  }
+  let previous = [];
+  for (let j = 0; j <= b.length; j++) {
+    previous.push(j);
+  }
+  for (let i = 1; i <= a.length; i++) {
+    const current = [i];
+    let rowMinimum = i;
+    for (let j = 1; j <= b.length; j++) {
+      const cost = a.charAt(i - 1) === b.charAt(j - 1) ? 0 : 1;
+      current.push(Math.min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost));
+      rowMinimum = Math.min(rowMinimum, current[j]);
+    }
+    if (rowMinimum > maxDistance) {
+      return maxDistance + 1;
+    }
+    previous = current;
+  }
+  return previous[b.length];
+}
+
+function hasPrefixMatch(queryTerm, shards) {
+  // checks if a term of the shard of queryTerm starts with queryTerm
+  return (shards[shardKey(queryTerm)] || []).some(function(entry) {
+    return entry[0].startsWith(queryTerm);
+  });
+}
+
+function scoreQuery(query, meta, shards) {
+  // returns the [document, score] pairs matching query, best first.
+  // exact, prefix and fuzzy matches of every query term are scored by
+  // their tf-idf weight and the boost of the field. A term without exact
+  // or prefix matches may have a typo in its first character, and is
+  // matched fuzzily against the terms of all the shards
+  const scores = {};
+  for (const queryTerm of tokenize(query)) {
+    const maxDistance = Math.floor(queryTerm.length * FUZZY + 0.5);
+    const keys = hasPrefixMatch(queryTerm, shards) ? [shardKey(queryTerm)] : Object.keys(shards).sort();
+    for (const [term, postings] of [].concat(...keys.map(function(key) { return shards[key] || []; }))) {
+      let weight;
+      if (term === queryTerm) {
+        weight = 1;
+      } else if (term.startsWith(queryTerm)) {
+        weight = PREFIX_WEIGHT * term.length / (term.length + 0.3 * (term.length - queryTerm.length));
+      } else {
+        const distance = editDistance(queryTerm, term, maxDistance);
+        if (distance > maxDistance) {
+          continue;
+        }
+        weight = FUZZY_WEIGHT * term.length / (term.length + distance);
+      }
+      const documents = new Set();
+      for (let k = 0; k < postings.length; k += 3) {
+        documents.add(postings[k]);
+      }
+      const idf = Math.log(1 + meta['documents'] / documents.size);
+      for (let k = 0; k < postings.length; k += 3) {
+        const document = postings[k];
+        scores[document] = (scores[document] || 0) +
+          weight * meta['boost'][postings[k + 1]] * idf * postings[k + 2];
+      }
+    }
+  }
+  return Object.keys(scores).map(function(document) {
+    return [Number(document), scores[document]];
+  }).sort(function(a, b) {
+    return b[1] - a[1] || a[0] - b[0];
+  });
+}
+
+function loadOnce(name, callback) {
+  // downloads the index file name once, callers which ask for it while it
+  // is downloading wait for the same request
+  if (searchRequests[name] == null) {
+    searchRequests[name] = $.getJSON(SEARCH_INDEX_URL + name, callback)
+      .fail(function() {
+        delete searchRequests[name];
+      });
+  }
+  return searchRequests[name];
+}
+
+function loadShards(keys) {
+  return $.when.apply($, keys.filter(function(key) {
+    return searchIndexMeta['shards'].indexOf(key) !== -1;
+  }).map(function(key) {
+    return loadOnce(`terms-${key}.json`, function(data) {
+      searchShards[key] = data;
+    });
+  }));
+}
+
+function loadSearchIndex(query, callback) {
+  // downloads the meta data of the index, the shards of the query terms
+  // and the result payload, each of them once. All the shards are needed
+  // for the terms without exact or prefix matches, see scoreQuery
+  loadOnce('meta.json', function(data) {
+    searchIndexMeta = data;
+  }).done(function() {
+    const terms = tokenize(query);
+    const documents = loadOnce('docs.json', function(data) {
+      searchDocuments = data;
+    });
+    loadShards(terms.map(shardKey)).done(function() {
+      const fuzzy = terms.some(function(term) {
+        return !hasPrefixMatch(term, searchShards);
+      });
+      $.when(documents, loadShards(fuzzy ? searchIndexMeta['shards'] : [])).done(callback);
+    });
+  });
+}
+
 function loadAllAppImageCards() {
-  // get the json file
-  if ($.trim( $('#appimage-search-box').val() ) !== '') {
+  const query = $('#appimage-search-box').val();
+  if ($.trim(query) !== '') {
     // the user has entered something, filter the list accordingly
-    $.getJSON('../index.min.json', function(data) {
-      console.log('Searching using miniSearch');
-      if (miniSearch == null) {
-        // index minisearch once and only once
-        // reduces CPU usage
-
-        console.log('minisearch indexed.');
-        miniSearch = new MiniSearch({
-          fields: ['name', 'summary', 'maintainer'],
-            // fields to index for full-text search
-          storeFields: ['name', 'summary', 'maintainer', 'categories_html', 'image', 'github'],
-            // fields to return with search results
-          idField: 'name',
-          searchOptions: {
-            boost: {'name': 2},
-            fuzzy: 0.5,
-          },
+    loadSearchIndex(query, function() {
+      const results = scoreQuery(query, searchIndexMeta, searchShards);
+      $.each(results, function(i, result) {
+        const item = {};
+        $.each(searchIndexMeta['display'], function(j, field) {
+          item[field] = searchDocuments[result[0]][j];
         });
-        // Index all documents
-        miniSearch.addAll(data);
-      }
-      const results = miniSearch.search($('#appimage-search-box').val());
-      $.each(results, function(i, item) {
         addAppimageCard(i, item);
       });
       console.log(results.length)
       if (results.length == 0) {
         $("#col-0").append("No results found")
-      } 
+      }
     });
   }
 }